@@ -39,19 +39,27 @@ DEFAULT_TEMPERATURE = 0.3
 GPT_TEMPERATURE = DEFAULT_TEMPERATURE
 GEMINI_TEMPERATURE = DEFAULT_TEMPERATURE
 
+# Response cache settings (on-disk cache of LLM responses reused across runs)
+RAG_CACHE_PATH = os.getenv("RAG_CACHE_PATH", ".rag_cache")
+
+# Semantic cache settings (responses reused for near-duplicate queries about the same message)
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", ".semantic_cache.pkl")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+# Comparison checkpoint (answers appended as they arrive, so an interrupted run resumes)
+COMPARISON_CHECKPOINT_PATH = os.getenv("COMPARISON_CHECKPOINT_PATH", ".comparison_checkpoint.jsonl")
+
+# Cascade evaluation (Gemini is skipped for queries whose GPT answer's numeric and
+# currency scores average at least this)
+CASCADE_THRESHOLD = float(os.getenv("CASCADE_THRESHOLD", "0.9"))
+
 # Logging settings
 ENABLE_LOGGING = True
 LOG_LEVEL = "INFO"
 
-def validate_api_keys():
-    """Validate that API keys are properly set."""
-    warnings = []
-    
-    if OPENAI_API_KEY == DEFAULT_OPENAI_KEY:
-        warnings.append("⚠️  Using default OpenAI API key. Set OPENAI_API_KEY environment variable for production use.")
-    
-    if not GEMINI_API_KEY or GEMINI_API_KEY == "your-gemini-key-here":
-        warnings.append("""
+# Warnings printed by validate_api_keys, built once at import
+_OPENAI_KEY_WARNING = "⚠️  Using default OpenAI API key. Set OPENAI_API_KEY environment variable for production use."
+_GEMINI_KEY_WARNING = """
 ❌ Gemini API key not set. To enable Gemini:
 1. Go to https://makersuite.google.com/app/apikey
 2. If you haven't already:
@@ -70,9 +78,19 @@ Note: If you get a '403 Generative Language API has not been used in project' er
 3. Search for 'Generative Language API' and enable it
 4. Wait a few minutes for the API to be fully enabled
 5. Try running the tests again
-""")
+"""
+
+def validate_api_keys():
+    """Validate that API keys are properly set."""
+    openai_valid = OPENAI_API_KEY != DEFAULT_OPENAI_KEY
+    gemini_valid = bool(GEMINI_API_KEY) and GEMINI_API_KEY != DEFAULT_GEMINI_KEY
+    
+    if openai_valid and gemini_valid:
+        return True
     
-    for warning in warnings:
-        print(warning)
+    if not openai_valid:
+        print(_OPENAI_KEY_WARNING)
+    if not gemini_valid:
+        print(_GEMINI_KEY_WARNING)
     
-    return len(warnings) == 0 
\ No newline at end of file
+    return False
@@ -1,8 +1,15 @@
 """ISO 20022 sample data package."""
 
+from typing import Any
+
+from . import sample_messages
 from .sample_messages import (
-    SAMPLE_PACS008, SAMPLE_INTERNATIONAL, SAMPLE_HIGH_VALUE,
+    get_sample_pacs008, get_sample_international, get_sample_high_value,
     EXPECTED_SUMMARIES, VALIDATION_DATA
 )
 
-__version__ = "0.1.0" 
\ No newline at end of file
+__version__ = "0.1.0"
+
+def __getattr__(name: str) -> Any:
+    """Resolve the legacy SAMPLE_* names lazily from sample_messages."""
+    return getattr(sample_messages, name)
@@ -1,68 +1,47 @@
 """Generate sample ISO 20022 messages for testing."""
 
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List
-import xml.dom.minidom as minidom
+from functools import lru_cache
+from types import ModuleType
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-class ISO20022MessageGenerator:
-    def __init__(self):
-        self.banks = [
-            ("DEUTDEFF", "Deutsche Bank"),
-            ("CHASUS33", "JPMorgan Chase"),
-            ("BARCGB22", "Barclays Bank"),
-            ("BNPAFRPP", "BNP Paribas"),
-            ("UBSWCHZH", "UBS"),
-            ("CITIGB2L", "Citibank London"),
-            ("HSBCHKHH", "HSBC Hong Kong"),
-            ("MHCBJPJT", "Mizuho Bank")
-        ]
-        
-        self.currencies = ["USD", "EUR", "GBP", "JPY", "CHF", "AUD"]
-        self.countries = ["US", "GB", "DE", "FR", "CH", "JP", "HK", "SG"]
-        
-    def _generate_id(self, prefix: str = "MSG") -> str:
-        """Generate a unique message ID."""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        random_suffix = ''.join(random.choices('0123456789', k=6))
-        return f"{prefix}{timestamp}{random_suffix}"
-    
-    def _generate_amount(self) -> tuple:
-        """Generate a random amount and currency."""
-        amount = round(random.uniform(1000, 1000000), 2)
-        currency = random.choice(self.currencies)
-        return str(amount), currency
-    
-    def _generate_datetime(self, days_offset: int = 0) -> str:
-        """Generate a datetime string with optional offset."""
-        base_date = datetime.now() + timedelta(days=days_offset)
-        return base_date.strftime("%Y-%m-%dT%H:%M:%S")
-    
-    def _generate_bank_info(self) -> tuple:
-        """Generate random bank BIC and name."""
-        return random.choice(self.banks)
-    
-    def _generate_iban(self, country: str) -> str:
-        """Generate a dummy IBAN."""
-        country_code = country
-        check_digits = ''.join(random.choices('0123456789', k=2))
-        bank_code = ''.join(random.choices('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=8))
-        account_number = ''.join(random.choices('0123456789', k=10))
-        return f"{country_code}{check_digits}{bank_code}{account_number}"
-    
-    def generate_pacs008(self) -> str:
-        """Generate a pacs.008 message."""
-        msg_id = self._generate_id("PACS008")
-        created_dt = self._generate_datetime()
-        amount, currency = self._generate_amount()
-        
-        debtor_bank_bic, debtor_bank_name = self._generate_bank_info()
-        creditor_bank_bic, creditor_bank_name = self._generate_bank_info()
-        
-        debtor_country = random.choice(self.countries)
-        creditor_country = random.choice(self.countries)
-        
-        xml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+import numpy as np
+
+DEFAULT_MESSAGE_TYPES = ["pacs.008", "pacs.002", "camt.053", "pain.001"]
+
+# Below this many messages the process pool costs more than it saves
+PARALLEL_MIN_COUNT = 64
+
+# Either a seeded random.Random or the random module itself, whose functions
+# draw from the shared generator so random.seed() keeps generation reproducible
+RandomSource = Union[random.Random, ModuleType]
+
+# Fixed timestamp for seeded fixtures so the same seed yields the same XML
+_FIXTURE_NOW = datetime(2024, 1, 1)
+
+# 256-entry byte lookup table so a single random draw can be mapped onto the
+# alphanumeric alphabet with bytes.translate instead of random.choices.
+_ALNUM = b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_ALNUM_TABLE = bytes(_ALNUM[i % len(_ALNUM)] for i in range(256))
+
+
+@lru_cache(maxsize=16)
+def _format_datetime(moment: datetime, fmt: str) -> str:
+    """strftime, memoized so a batch sharing one timestamp formats it once."""
+    return moment.strftime(fmt)
+
+
+def _random_bytes(n: int, rng: RandomSource) -> bytes:
+    """Draw n random bytes from rng in one call."""
+    return rng.getrandbits(8 * n).to_bytes(n, "big")
+
+
+# Message templates, filled once per message with str.format_map
+# pacs.008
+_PACS008_TMPL = """<?xml version="1.0" encoding="UTF-8"?>
 <Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">
     <FIToFICstmrCdtTrf>
         <GrpHdr>
@@ -86,7 +65,7 @@ class ISO20022MessageGenerator:
                 <Id>
                     <PrvtId>
                         <Othr>
-                            <Id>{self._generate_iban(debtor_country)}</Id>
+                            <Id>{debtor_iban}</Id>
                         </Othr>
                     </PrvtId>
                 </Id>
@@ -96,7 +75,7 @@ class ISO20022MessageGenerator:
                 <Id>
                     <PrvtId>
                         <Othr>
-                            <Id>{self._generate_iban(creditor_country)}</Id>
+                            <Id>{creditor_iban}</Id>
                         </Othr>
                     </PrvtId>
                 </Id>
@@ -104,19 +83,9 @@ class ISO20022MessageGenerator:
         </CdtTrfTxInf>
     </FIToFICstmrCdtTrf>
 </Document>"""
-        
-        # Format XML with proper indentation
-        dom = minidom.parseString(xml_content)
-        return dom.toprettyxml(indent="    ")
-    
-    def generate_pacs002(self) -> str:
-        """Generate a pacs.002 message."""
-        msg_id = self._generate_id("PACS002")
-        created_dt = self._generate_datetime()
-        orig_msg_id = self._generate_id("ORIG")
-        status = random.choice(["ACCP", "ACSC", "ACSP", "RJCT"])
-        
-        xml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+
+# pacs.002
+_PACS002_TMPL = """<?xml version="1.0" encoding="UTF-8"?>
 <Document xmlns="urn:iso:std:iso:20022:tech:xsd:pacs.002.001.12">
     <FIToFIPmtStsRpt>
         <GrpHdr>
@@ -130,19 +99,9 @@ class ISO20022MessageGenerator:
         </OrgnlGrpInfAndSts>
     </FIToFIPmtStsRpt>
 </Document>"""
-        
-        dom = minidom.parseString(xml_content)
-        return dom.toprettyxml(indent="    ")
-    
-    def generate_camt053(self) -> str:
-        """Generate a camt.053 message."""
-        msg_id = self._generate_id("CAMT053")
-        created_dt = self._generate_datetime()
-        stmt_id = self._generate_id("STMT")
-        account_id = self._generate_iban(random.choice(self.countries))
-        balance_amount, balance_currency = self._generate_amount()
-        
-        xml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+
+# camt.053
+_CAMT053_TMPL = """<?xml version="1.0" encoding="UTF-8"?>
 <Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.10">
     <BkToCstmrStmt>
         <GrpHdr>
@@ -162,21 +121,9 @@ class ISO20022MessageGenerator:
         </Stmt>
     </BkToCstmrStmt>
 </Document>"""
-        
-        dom = minidom.parseString(xml_content)
-        return dom.toprettyxml(indent="    ")
-    
-    def generate_pain001(self) -> str:
-        """Generate a pain.001 message."""
-        msg_id = self._generate_id("PAIN001")
-        created_dt = self._generate_datetime()
-        amount, currency = self._generate_amount()
-        execution_date = self._generate_datetime(days_offset=1)
-        
-        debtor_country = random.choice(self.countries)
-        creditor_country = random.choice(self.countries)
-        
-        xml_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+
+# pain.001
+_PAIN001_TMPL = """<?xml version="1.0" encoding="UTF-8"?>
 <Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.11">
     <CstmrCdtTrfInitn>
         <GrpHdr>
@@ -187,7 +134,7 @@ class ISO20022MessageGenerator:
             </InitgPty>
         </GrpHdr>
         <PmtInf>
-            <PmtInfId>{self._generate_id("PMT")}</PmtInfId>
+            <PmtInfId>{payment_info_id}</PmtInfId>
             <PmtMtd>TRF</PmtMtd>
             <ReqdExctnDt>{execution_date}</ReqdExctnDt>
             <Dbtr>
@@ -195,12 +142,12 @@ class ISO20022MessageGenerator:
             </Dbtr>
             <DbtrAcct>
                 <Id>
-                    <IBAN>{self._generate_iban(debtor_country)}</IBAN>
+                    <IBAN>{debtor_iban}</IBAN>
                 </Id>
             </DbtrAcct>
             <CdtTrfTxInf>
                 <PmtId>
-                    <EndToEndId>{self._generate_id("E2E")}</EndToEndId>
+                    <EndToEndId>{end_to_end_id}</EndToEndId>
                 </PmtId>
                 <Amt>
                     <InstdAmt Ccy="{currency}">{amount}</InstdAmt>
@@ -210,18 +157,283 @@ class ISO20022MessageGenerator:
                 </Cdtr>
                 <CdtrAcct>
                     <Id>
-                        <IBAN>{self._generate_iban(creditor_country)}</IBAN>
+                        <IBAN>{creditor_iban}</IBAN>
                     </Id>
                 </CdtrAcct>
             </CdtTrfTxInf>
         </PmtInf>
     </CstmrCdtTrfInitn>
 </Document>"""
+
+
+class ISO20022MessageGenerator:
+    def __init__(self, rng: Optional[RandomSource] = None) -> None:
+        """Create a generator.
+        
+        Args:
+            rng: Random source for every draw. Defaults to the random module's
+                functions; pass random.Random(seed) for an isolated stream.
+        """
+        self.rng: RandomSource = rng if rng is not None else random
+        
+        self.banks: List[Tuple[str, str]] = [
+            ("DEUTDEFF", "Deutsche Bank"),
+            ("CHASUS33", "JPMorgan Chase"),
+            ("BARCGB22", "Barclays Bank"),
+            ("BNPAFRPP", "BNP Paribas"),
+            ("UBSWCHZH", "UBS"),
+            ("CITIGB2L", "Citibank London"),
+            ("HSBCHKHH", "HSBC Hong Kong"),
+            ("MHCBJPJT", "Mizuho Bank")
+        ]
         
-        dom = minidom.parseString(xml_content)
-        return dom.toprettyxml(indent="    ")
+        # Parallel BIC/name lists so a bank is drawn with a single index
+        bics, names = zip(*self.banks)
+        self.bank_bics: List[str] = list(bics)
+        self.bank_names: List[str] = list(names)
+        self._n_banks: int = len(self.bank_bics)
+        
+        self.currencies: List[str] = ["USD", "EUR", "GBP", "JPY", "CHF", "AUD"]
+        self.countries: List[str] = ["US", "GB", "DE", "FR", "CH", "JP", "HK", "SG"]
+        
+    def _generate_id(self, prefix: str = "MSG", now: Optional[datetime] = None) -> str:
+        """Generate a unique message ID."""
+        timestamp = _format_datetime(now or datetime.now(), "%Y%m%d%H%M%S")
+        random_suffix = f"{self.rng.getrandbits(20) % 1_000_000:06d}"
+        return f"{prefix}{timestamp}{random_suffix}"
+    
+    def _generate_amount(self) -> Tuple[str, str]:
+        """Generate a random amount and currency."""
+        amount = round(self.rng.uniform(1000, 1000000), 2)
+        currency = self.rng.choice(self.currencies)
+        return str(amount), currency
+    
+    def _generate_datetime(self, days_offset: int = 0, now: Optional[datetime] = None) -> str:
+        """Generate a datetime string with optional offset."""
+        base_date = (now or datetime.now()) + timedelta(days=days_offset)
+        return _format_datetime(base_date, "%Y-%m-%dT%H:%M:%S")
     
-    def generate_test_messages(self, count: int = 1, message_types: List[str] = None) -> List[str]:
+    def _generate_bank_indices(self, n: int) -> List[int]:
+        """Draw n bank indices at once for batch generation."""
+        return self.rng.choices(range(self._n_banks), k=n)
+    
+    def _generate_iban(self, country: str) -> str:
+        """Generate a dummy IBAN."""
+        check_digits = self.rng.getrandbits(7) % 100
+        bank_code = _random_bytes(8, self.rng).translate(_ALNUM_TABLE).decode("ascii")
+        account_number = self.rng.getrandbits(34) % 10_000_000_000
+        return f"{country}{check_digits:02d}{bank_code}{account_number:010d}"
+    
+    def generate_pacs008(
+        self,
+        now: Optional[datetime] = None,
+        *,
+        amount: Optional[float] = None,
+        currency: Optional[str] = None,
+        bank_indices: Optional[Sequence[int]] = None,
+        countries: Optional[Sequence[str]] = None
+    ) -> str:
+        """Generate a pacs.008 message.
+
+        Args:
+            now: Timestamp shared by the message's IDs and dates. Defaults to
+                the current time.
+            amount, currency: Pre-drawn settlement amount and currency.
+            bank_indices: Pre-drawn (debtor, creditor) indices into self.banks.
+            countries: Pre-drawn (debtor, creditor) IBAN countries.
+            Any value left as None is drawn here.
+        """
+        if now is None:
+            now = datetime.now()
+        msg_id = self._generate_id("PACS008", now)
+        created_dt = self._generate_datetime(now=now)
+        if amount is None or currency is None:
+            amount_str, currency = self._generate_amount()
+        else:
+            amount_str = str(amount)
+        
+        if bank_indices is None:
+            bank_indices = self._generate_bank_indices(2)
+        debtor_bank, creditor_bank = bank_indices
+        
+        if countries is None:
+            countries = self.rng.choices(self.countries, k=2)
+        debtor_country, creditor_country = countries
+        
+        return _PACS008_TMPL.format_map({
+            "msg_id": msg_id,
+            "created_dt": created_dt,
+            "amount": amount_str,
+            "currency": currency,
+            "debtor_bank_bic": self.bank_bics[debtor_bank],
+            "debtor_bank_name": self.bank_names[debtor_bank],
+            "creditor_bank_bic": self.bank_bics[creditor_bank],
+            "creditor_bank_name": self.bank_names[creditor_bank],
+            "debtor_iban": self._generate_iban(debtor_country),
+            "creditor_iban": self._generate_iban(creditor_country)
+        })
+    
+    def generate_pacs002(self, now: Optional[datetime] = None) -> str:
+        """Generate a pacs.002 message.
+
+        Args:
+            now: Timestamp shared by the message's IDs and dates. Defaults to
+                the current time.
+        """
+        if now is None:
+            now = datetime.now()
+        msg_id = self._generate_id("PACS002", now)
+        created_dt = self._generate_datetime(now=now)
+        orig_msg_id = self._generate_id("ORIG", now)
+        status = self.rng.choice(["ACCP", "ACSC", "ACSP", "RJCT"])
+        
+        return _PACS002_TMPL.format_map({
+            "msg_id": msg_id,
+            "created_dt": created_dt,
+            "orig_msg_id": orig_msg_id,
+            "status": status
+        })
+    
+    def generate_camt053(
+        self,
+        now: Optional[datetime] = None,
+        *,
+        amount: Optional[float] = None,
+        currency: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> str:
+        """Generate a camt.053 message.
+
+        Args:
+            now: Timestamp shared by the message's IDs and dates. Defaults to
+                the current time.
+            amount, currency: Pre-drawn balance amount and currency.
+            country: Pre-drawn account IBAN country.
+            Any value left as None is drawn here.
+        """
+        if now is None:
+            now = datetime.now()
+        msg_id = self._generate_id("CAMT053", now)
+        created_dt = self._generate_datetime(now=now)
+        stmt_id = self._generate_id("STMT", now)
+        if country is None:
+            country = self.rng.choice(self.countries)
+        account_id = self._generate_iban(country)
+        if amount is None or currency is None:
+            balance_amount, balance_currency = self._generate_amount()
+        else:
+            balance_amount, balance_currency = str(amount), currency
+        
+        return _CAMT053_TMPL.format_map({
+            "msg_id": msg_id,
+            "created_dt": created_dt,
+            "stmt_id": stmt_id,
+            "account_id": account_id,
+            "balance_amount": balance_amount,
+            "balance_currency": balance_currency
+        })
+    
+    def generate_pain001(
+        self,
+        now: Optional[datetime] = None,
+        *,
+        amount: Optional[float] = None,
+        currency: Optional[str] = None,
+        countries: Optional[Sequence[str]] = None
+    ) -> str:
+        """Generate a pain.001 message.
+
+        Args:
+            now: Timestamp shared by the message's IDs and dates. Defaults to
+                the current time.
+            amount, currency: Pre-drawn instructed amount and currency.
+            countries: Pre-drawn (debtor, creditor) IBAN countries.
+            Any value left as None is drawn here.
+        """
+        if now is None:
+            now = datetime.now()
+        msg_id = self._generate_id("PAIN001", now)
+        created_dt = self._generate_datetime(now=now)
+        if amount is None or currency is None:
+            amount_str, currency = self._generate_amount()
+        else:
+            amount_str = str(amount)
+        execution_date = self._generate_datetime(days_offset=1, now=now)
+        
+        if countries is None:
+            countries = self.rng.choices(self.countries, k=2)
+        debtor_country, creditor_country = countries
+        
+        return _PAIN001_TMPL.format_map({
+            "msg_id": msg_id,
+            "created_dt": created_dt,
+            "payment_info_id": self._generate_id("PMT", now),
+            "execution_date": execution_date,
+            "debtor_iban": self._generate_iban(debtor_country),
+            "end_to_end_id": self._generate_id("E2E", now),
+            "amount": amount_str,
+            "currency": currency,
+            "creditor_iban": self._generate_iban(creditor_country)
+        })
+    
+    def _pick_message_types(self, count: int, message_types: Optional[List[str]]) -> List[str]:
+        """Draw the message type of every message in a batch up front."""
+        if message_types is None:
+            message_types = DEFAULT_MESSAGE_TYPES
+        if len(message_types) > 1:
+            return self.rng.choices(message_types, k=count)
+        return message_types * count
+    
+    def _generate_picked(self, picks: List[str], now: datetime) -> List[str]:
+        """Generate one message per picked type, dispatching through a table.
+        
+        Amounts, currencies, bank indices and countries for the whole batch
+        are drawn up front with vectorized NumPy calls, one pool per value,
+        and message i reads its slice of each pool.
+        """
+        count = len(picks)
+        # Seeded from self.rng so a seeded generator makes the batch reproducible
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        amounts: List[float] = rng.uniform(1000, 1000000, size=count).round(2).tolist()
+        currencies = [
+            self.currencies[j]
+            for j in rng.integers(0, len(self.currencies), size=count).tolist()
+        ]
+        banks: List[int] = rng.integers(0, self._n_banks, size=2 * count).tolist()
+        countries = [
+            self.countries[j]
+            for j in rng.integers(0, len(self.countries), size=2 * count).tolist()
+        ]
+        
+        dispatch: Dict[str, Callable[[int], str]] = {
+            "pacs.008": lambda i: self.generate_pacs008(
+                now,
+                amount=amounts[i],
+                currency=currencies[i],
+                bank_indices=banks[2 * i:2 * i + 2],
+                countries=countries[2 * i:2 * i + 2]
+            ),
+            "pacs.002": lambda i: self.generate_pacs002(now),
+            "camt.053": lambda i: self.generate_camt053(
+                now,
+                amount=amounts[i],
+                currency=currencies[i],
+                country=countries[2 * i]
+            ),
+            "pain.001": lambda i: self.generate_pain001(
+                now,
+                amount=amounts[i],
+                currency=currencies[i],
+                countries=countries[2 * i:2 * i + 2]
+            )
+        }
+        return [
+            dispatch[msg_type](i)
+            for i, msg_type in enumerate(picks)
+            if msg_type in dispatch
+        ]
+    
+    def generate_test_messages(self, count: int = 1, message_types: Optional[List[str]] = None) -> List[str]:
         """Generate a list of test messages.
         
         Args:
@@ -231,20 +443,66 @@ class ISO20022MessageGenerator:
         Returns:
             List of XML message strings
         """
-        if message_types is None:
-            message_types = ["pacs.008", "pacs.002", "camt.053", "pain.001"]
-            
-        messages = []
-        for _ in range(count):
-            msg_type = random.choice(message_types) if len(message_types) > 1 else message_types[0]
+        # One timestamp per batch so every message reuses the same formatted strings
+        now = datetime.now()
+        return self._generate_picked(self._pick_message_types(count, message_types), now)
+    
+    def generate_fixture(self, msg_type: str, seed: int) -> str:
+        """Generate a deterministic message for use as a test fixture.
+        
+        The same (msg_type, seed) pair always returns the same XML, and repeat
+        calls are served from a module-level LRU cache.
+        """
+        return _cached_generate(msg_type, seed)
+    
+    def generate_test_messages_parallel(
+        self,
+        count: int,
+        message_types: Optional[List[str]] = None,
+        workers: Optional[int] = None
+    ) -> List[str]:
+        """Generate test messages across a process pool.
+        
+        Generation is pure Python string work, so large batches are split
+        across processes to sidestep the GIL. Batches smaller than
+        PARALLEL_MIN_COUNT are generated serially to avoid pool start-up cost.
+        
+        Args:
+            count: Number of messages to generate
+            message_types: List of message types to generate. If None, generates random types.
+            workers: Number of worker processes. Defaults to the CPU count.
             
-            if msg_type == "pacs.008":
-                messages.append(self.generate_pacs008())
-            elif msg_type == "pacs.002":
-                messages.append(self.generate_pacs002())
-            elif msg_type == "camt.053":
-                messages.append(self.generate_camt053())
-            elif msg_type == "pain.001":
-                messages.append(self.generate_pain001())
-                
-        return messages 
\ No newline at end of file
+        Returns:
+            List of XML message strings, in the same order as the serial path
+        """
+        if count < PARALLEL_MIN_COUNT:
+            return self.generate_test_messages(count, message_types)
+        
+        now = datetime.now()
+        picks = self._pick_message_types(count, message_types)
+        workers = workers or os.cpu_count() or 1
+        chunk_size = -(-count // workers)
+        
+        # Each chunk gets its own seed so forked workers don't share random state
+        chunks = [
+            (picks[i:i + chunk_size], now, self.rng.getrandbits(64))
+            for i in range(0, count, chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_worker_generate, chunks)
+        return [message for chunk in results for message in chunk]
+
+
+def _worker_generate(chunk: Tuple[List[str], datetime, int]) -> List[str]:
+    """Process-pool entry point: generate one chunk of picked message types."""
+    picks, now, seed = chunk
+    return ISO20022MessageGenerator(random.Random(seed))._generate_picked(picks, now)
+
+
+@lru_cache(maxsize=256)
+def _cached_generate(msg_type: str, seed: int) -> str:
+    """Generate one seeded fixture message; repeat requests hit the cache."""
+    messages = ISO20022MessageGenerator(random.Random(seed))._generate_picked([msg_type], _FIXTURE_NOW)
+    if not messages:
+        raise ValueError(f"Unsupported message type: {msg_type}")
+    return messages[0]
@@ -1,5 +1,7 @@
 """ISO 20022 message type definitions and templates."""
 
+import sys
+
 # Message type definitions
 MESSAGE_TYPES = {
     "pacs": {
@@ -33,6 +35,18 @@ MESSAGE_TYPES = {
     }
 }
 
+# Flat views of MESSAGE_TYPES for single-lookup access by message type
+MESSAGE_TYPE_DESCRIPTIONS = {
+    msg_type: description
+    for family in MESSAGE_TYPES.values()
+    for msg_type, description in family.items()
+}
+MESSAGE_TYPE_FAMILIES = {
+    msg_type: family
+    for family, messages in MESSAGE_TYPES.items()
+    for msg_type in messages
+}
+
 # XML namespace definitions
 XML_NAMESPACES = {
     "pacs.008": "urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10",
@@ -199,4 +213,15 @@ CHARGE_BEARERS = {
     "CRED": "All transaction charges are to be borne by the creditor",
     "SHAR": "Shared charges (SHA) - Transaction charges on the sender side are borne by the debtor, transaction charges on the receiver side are borne by the creditor",
     "SLEV": "Following Service Level - Charges are to be applied following the rules agreed in the service level and/or scheme"
-} 
\ No newline at end of file
+} 
+
+# Intern the keys of the lookup tables so repeated lookups with the same codes
+# can short-circuit on identity. Re-inserting every key keeps the original order.
+for _table in (
+    MESSAGE_TYPES, MESSAGE_TYPE_DESCRIPTIONS, MESSAGE_TYPE_FAMILIES, XML_NAMESPACES,
+    CURRENCIES, COUNTRIES, BANK_CODES, STATUS_CODES, PAYMENT_PURPOSES,
+    REGULATORY_CODES, CHARGE_BEARERS
+):
+    for _key in list(_table):
+        _table[sys.intern(_key)] = _table.pop(_key)
+del _table, _key
\ No newline at end of file
@@ -1,204 +1,44 @@
 """Sample ISO 20022 messages for testing and demonstration."""
 
+from functools import lru_cache
+from pathlib import Path
+
 # XML namespace for ISO 20022 messages
 XML_NAMESPACE = {
     'ns': 'urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10'
 }
 
-# Basic credit transfer message
-SAMPLE_PACS008 = """<?xml version="1.0" encoding="UTF-8"?>
-<ns:Document xmlns:ns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">
-  <ns:FIToFICstmrCdtTrf>
-    <ns:GrpHdr>
-      <ns:MsgId>MSG123456789</ns:MsgId>
-      <ns:CreDtTm>2025-07-16T10:30:00Z</ns:CreDtTm>
-      <ns:NbOfTxs>1</ns:NbOfTxs>
-      <ns:TtlIntrBkSttlmAmt Ccy="USD">12345.67</ns:TtlIntrBkSttlmAmt>
-    </ns:GrpHdr>
-    <ns:CdtTrfTxInf>
-      <ns:PmtId>
-        <ns:InstrId>INSTR123</ns:InstrId>
-        <ns:EndToEndId>E2E123456</ns:EndToEndId>
-      </ns:PmtId>
-      <ns:IntrBkSttlmAmt Ccy="USD">12345.67</ns:IntrBkSttlmAmt>
-      <ns:ChrgBr>SHAR</ns:ChrgBr>
-      <ns:Dbtr>
-        <ns:Nm>John Doe</ns:Nm>
-        <ns:PstlAdr>
-          <ns:Ctry>US</ns:Ctry>
-        </ns:PstlAdr>
-      </ns:Dbtr>
-      <ns:DbtrAcct>
-        <ns:Id>
-          <ns:Othr>
-            <ns:Id>1234567890</ns:Id>
-          </ns:Othr>
-        </ns:Id>
-      </ns:DbtrAcct>
-      <ns:DbtrAgt>
-        <ns:FinInstnId>
-          <ns:BICFI>BOFAUS3N</ns:BICFI>
-        </ns:FinInstnId>
-      </ns:DbtrAgt>
-      <ns:CdtrAgt>
-        <ns:FinInstnId>
-          <ns:BICFI>CHASUS33</ns:BICFI>
-        </ns:FinInstnId>
-      </ns:CdtrAgt>
-      <ns:Cdtr>
-        <ns:Nm>Jane Smith</ns:Nm>
-        <ns:PstlAdr>
-          <ns:Ctry>US</ns:Ctry>
-        </ns:PstlAdr>
-      </ns:Cdtr>
-      <ns:CdtrAcct>
-        <ns:Id>
-          <ns:Othr>
-            <ns:Id>0987654321</ns:Id>
-          </ns:Othr>
-        </ns:Id>
-      </ns:CdtrAcct>
-    </ns:CdtTrfTxInf>
-  </ns:FIToFICstmrCdtTrf>
-</ns:Document>
-"""
+_SAMPLES_DIR = Path(__file__).parent / "samples"
+
+# Legacy constant names mapped to their sample files
+_SAMPLE_FILES = {
+    "SAMPLE_PACS008": "pacs008.xml",
+    "SAMPLE_INTERNATIONAL": "international.xml",
+    "SAMPLE_HIGH_VALUE": "high_value.xml"
+}
+
+@lru_cache(maxsize=None)
+def _load_sample(filename: str) -> str:
+    """Read a sample message from disk the first time it is requested."""
+    return (_SAMPLES_DIR / filename).read_text(encoding="utf-8")
+
+def get_sample_pacs008() -> str:
+    """Basic credit transfer message."""
+    return _load_sample("pacs008.xml")
+
+def get_sample_international() -> str:
+    """International payment with multiple currencies."""
+    return _load_sample("international.xml")
 
-# International payment with multiple currencies
-SAMPLE_INTERNATIONAL = """<?xml version="1.0" encoding="UTF-8"?>
-<ns:Document xmlns:ns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">
-  <ns:FIToFICstmrCdtTrf>
-    <ns:GrpHdr>
-      <ns:MsgId>INTL987654321</ns:MsgId>
-      <ns:CreDtTm>2025-07-17T14:45:00Z</ns:CreDtTm>
-      <ns:NbOfTxs>1</ns:NbOfTxs>
-      <ns:TtlIntrBkSttlmAmt Ccy="EUR">50000.00</ns:TtlIntrBkSttlmAmt>
-    </ns:GrpHdr>
-    <ns:CdtTrfTxInf>
-      <ns:PmtId>
-        <ns:InstrId>INTL456</ns:InstrId>
-        <ns:EndToEndId>E2E789012</ns:EndToEndId>
-      </ns:PmtId>
-      <ns:IntrBkSttlmAmt Ccy="EUR">50000.00</ns:IntrBkSttlmAmt>
-      <ns:XchgRate>1.0850</ns:XchgRate>
-      <ns:ChrgBr>SHAR</ns:ChrgBr>
-      <ns:Dbtr>
-        <ns:Nm>Tech Corp GmbH</ns:Nm>
-        <ns:PstlAdr>
-          <ns:Ctry>DE</ns:Ctry>
-          <ns:AdrLine>Hauptstrasse 123, Berlin</ns:AdrLine>
-        </ns:PstlAdr>
-      </ns:Dbtr>
-      <ns:DbtrAcct>
-        <ns:Id>
-          <ns:IBAN>DE89370400440532013000</ns:IBAN>
-        </ns:Id>
-      </ns:DbtrAcct>
-      <ns:DbtrAgt>
-        <ns:FinInstnId>
-          <ns:BICFI>DEUTDEFF</ns:BICFI>
-        </ns:FinInstnId>
-      </ns:DbtrAgt>
-      <ns:CdtrAgt>
-        <ns:FinInstnId>
-          <ns:BICFI>BNPAFRPP</ns:BICFI>
-        </ns:FinInstnId>
-      </ns:CdtrAgt>
-      <ns:Cdtr>
-        <ns:Nm>Innovation SARL</ns:Nm>
-        <ns:PstlAdr>
-          <ns:Ctry>FR</ns:Ctry>
-          <ns:AdrLine>123 Rue de Paris, Paris</ns:AdrLine>
-        </ns:PstlAdr>
-      </ns:Cdtr>
-      <ns:CdtrAcct>
-        <ns:Id>
-          <ns:IBAN>FR7630006000011234567890189</ns:IBAN>
-        </ns:Id>
-      </ns:CdtrAcct>
-      <ns:RmtInf>
-        <ns:Ustrd>Invoice 2025-0123 Payment</ns:Ustrd>
-      </ns:RmtInf>
-    </ns:CdtTrfTxInf>
-  </ns:FIToFICstmrCdtTrf>
-</ns:Document>
-"""
+def get_sample_high_value() -> str:
+    """High-value payment with additional compliance checks."""
+    return _load_sample("high_value.xml")
 
-# High-value payment with additional compliance checks
-SAMPLE_HIGH_VALUE = """<?xml version="1.0" encoding="UTF-8"?>
-<ns:Document xmlns:ns="urn:iso:std:iso:20022:tech:xsd:pacs.008.001.10">
-  <ns:FIToFICstmrCdtTrf>
-    <ns:GrpHdr>
-      <ns:MsgId>HV123456789</ns:MsgId>
-      <ns:CreDtTm>2025-07-18T09:15:00Z</ns:CreDtTm>
-      <ns:NbOfTxs>1</ns:NbOfTxs>
-      <ns:TtlIntrBkSttlmAmt Ccy="USD">1000000.00</ns:TtlIntrBkSttlmAmt>
-    </ns:GrpHdr>
-    <ns:CdtTrfTxInf>
-      <ns:PmtId>
-        <ns:InstrId>HV789</ns:InstrId>
-        <ns:EndToEndId>E2E456789</ns:EndToEndId>
-      </ns:PmtId>
-      <ns:IntrBkSttlmAmt Ccy="USD">1000000.00</ns:IntrBkSttlmAmt>
-      <ns:ChrgBr>SHAR</ns:ChrgBr>
-      <ns:Dbtr>
-        <ns:Nm>Global Investments LLC</ns:Nm>
-        <ns:PstlAdr>
-          <ns:Ctry>US</ns:Ctry>
-          <ns:AdrLine>100 Wall Street, New York</ns:AdrLine>
-        </ns:PstlAdr>
-        <ns:Id>
-          <ns:OrgId>
-            <ns:LEI>724500ABC123DEF456GH</ns:LEI>
-          </ns:OrgId>
-        </ns:Id>
-      </ns:Dbtr>
-      <ns:DbtrAcct>
-        <ns:Id>
-          <ns:Othr>
-            <ns:Id>9876543210</ns:Id>
-          </ns:Othr>
-        </ns:Id>
-      </ns:DbtrAcct>
-      <ns:DbtrAgt>
-        <ns:FinInstnId>
-          <ns:BICFI>JPMCUS33</ns:BICFI>
-        </ns:FinInstnId>
-      </ns:DbtrAgt>
-      <ns:CdtrAgt>
-        <ns:FinInstnId>
-          <ns:BICFI>GSACGB2L</ns:BICFI>
-        </ns:FinInstnId>
-      </ns:CdtrAgt>
-      <ns:Cdtr>
-        <ns:Nm>European Asset Management Ltd</ns:Nm>
-        <ns:PstlAdr>
-          <ns:Ctry>GB</ns:Ctry>
-          <ns:AdrLine>1 London Bridge, London</ns:AdrLine>
-        </ns:PstlAdr>
-        <ns:Id>
-          <ns:OrgId>
-            <ns:LEI>213800XYZ456ABC789DE</ns:LEI>
-          </ns:OrgId>
-        </ns:Id>
-      </ns:Cdtr>
-      <ns:CdtrAcct>
-        <ns:Id>
-          <ns:IBAN>GB29NWBK60161331926819</ns:IBAN>
-        </ns:Id>
-      </ns:CdtrAcct>
-      <ns:RgltryRptg>
-        <ns:Dtls>
-          <ns:Tp>UKREG</ns:Tp>
-          <ns:Cd>GBFCA</ns:Cd>
-        </ns:Dtls>
-      </ns:RgltryRptg>
-      <ns:RmtInf>
-        <ns:Ustrd>Portfolio Investment Transfer Q3 2025</ns:Ustrd>
-      </ns:RmtInf>
-    </ns:CdtTrfTxInf>
-  </ns:FIToFICstmrCdtTrf>
-</ns:Document>
-"""
+def __getattr__(name: str) -> str:
+    """Load SAMPLE_* constants lazily so importing this module reads no XML."""
+    if name in _SAMPLE_FILES:
+        return _load_sample(_SAMPLE_FILES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Expected summaries for validation
 EXPECTED_SUMMARIES = {
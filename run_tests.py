@@ -1,5 +1,6 @@
 """Run model comparison tests."""
 
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -9,11 +10,55 @@ project_root = str(Path(__file__).parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from src.test_queries import run_model_comparison
-from config import validate_api_keys, OPENAI_API_KEY, GEMINI_API_KEY
+from src.test_queries import run_model_comparison, DEFAULT_CONCURRENCY
+from config import validate_api_keys, COMPARISON_CHECKPOINT_PATH, OPENAI_API_KEY, GEMINI_API_KEY
+
+def parse_args():
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Run ISO 20022 RAG model comparison tests")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="Maximum number of LLM calls in flight at once"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Number of LLM calls submitted per batch (default: all at once)"
+    )
+    parser.add_argument(
+        "--messages-per-type",
+        type=int,
+        default=1,
+        help="Number of generated messages tested per message type"
+    )
+    parser.add_argument(
+        "--no-pack-queries",
+        dest="pack_queries",
+        action="store_false",
+        help="Send each query in its own LLM call instead of packing a message's queries together"
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        dest="checkpoint_path",
+        action="store_const",
+        const=None,
+        default=COMPARISON_CHECKPOINT_PATH,
+        help="Neither resume from nor append to the comparison checkpoint file"
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Ask Gemini only the queries whose GPT answer scores below the cascade threshold"
+    )
+    return parser.parse_args()
 
 def main():
     """Main entry point for running tests."""
+    args = parse_args()
+    
     print("🚀 Starting ISO 20022 RAG Model Comparison")
     print("=" * 80)
 
@@ -26,7 +71,13 @@ def main():
         # Run tests with both models
         results = run_model_comparison(
             openai_key=OPENAI_API_KEY,
-            gemini_key=GEMINI_API_KEY
+            gemini_key=GEMINI_API_KEY,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            pack_queries=args.pack_queries,
+            checkpoint_path=args.checkpoint_path,
+            messages_per_type=args.messages_per_type,
+            cascade=args.cascade
         )
         
         print("\n✅ Tests completed successfully!")
@@ -43,12 +94,15 @@ def main():
         
         print("\nMethod Performance:")
         print("-" * 40)
+        # Cascade-skipped and failed answers leave a query out for both models
+        print(f"Compared over the {results.get('compared_queries', 0)} (method, query) pairs both models answered")
+        method_scores = results.get('method_scores', {})
         print("\ngpt:")
-        for metric, value in results.get('gpt_metrics', {}).items():
+        for metric, value in method_scores.get('gpt', {}).items():
             print(f"  {metric}: {value:.3f}")
         
         print("\ngemini:")
-        for metric, value in results.get('gemini_metrics', {}).items():
+        for metric, value in method_scores.get('gemini', {}).items():
             print(f"  {metric}: {value:.3f}")
             
     except Exception as e:
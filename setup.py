@@ -1,9 +1,19 @@
+import os
 from setuptools import setup, find_packages
 
+# Optionally compile the message generator to a C extension with mypyc
+# (ISO20022_RAG_MYPYC=1 pip install .); the pure-Python module is used otherwise.
+ext_modules = []
+if os.environ.get("ISO20022_RAG_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify(["data/message_generator.py"])
+
 setup(
     name="iso20022_rag",
     version="1.0.0",
     packages=find_packages(),
+    package_data={"data": ["samples/*.xml"]},
+    ext_modules=ext_modules,
     install_requires=[
         line.strip()
         for line in open("requirements.txt").readlines()
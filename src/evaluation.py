@@ -1,13 +1,36 @@
 """Evaluation metrics for ISO20022 RAG implementations."""
 
-import nltk
 import re
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
 import os
 import ssl
 
+import numpy as np
+
+# Sentence splitting uses the regex tokenizer unless USE_NLTK is set, in which
+# case NLTK's punkt tokenizer is imported and set up on first use
+USE_NLTK = bool(os.getenv("USE_NLTK"))
+
+@lru_cache(maxsize=None)
+def _punkt_available() -> bool:
+    """Check once whether the punkt tokenizer data is already installed."""
+    import nltk
+    
+    try:
+        nltk.data.find('tokenizers/punkt')
+        return True
+    except LookupError:
+        return False
+
 def setup_nltk():
     """Set up NLTK with proper SSL handling and data directory creation."""
+    import nltk
+    
+    # Nothing to do (and no SSL or filesystem changes) if punkt is installed
+    if _punkt_available():
+        return
+    
     try:
         # Handle SSL certificate verification
         try:
@@ -22,22 +45,77 @@ def setup_nltk():
         if not os.path.exists(nltk_data_dir):
             os.makedirs(nltk_data_dir)
 
-        # Download punkt tokenizer if not already present
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt', quiet=True)
+        # Download punkt tokenizer
+        nltk.download('punkt', quiet=True)
+        _punkt_available.cache_clear()
 
     except Exception as e:
         print(f"Warning: Error setting up NLTK: {str(e)}")
 
-# Run NLTK setup when module is imported
-setup_nltk()
+# NLTK is set up on first tokenization rather than at import
+_NLTK_READY = False
+
+def _ensure_nltk():
+    """Run setup_nltk once per process, on first use."""
+    global _NLTK_READY
+    if not _NLTK_READY:
+        setup_nltk()
+        _NLTK_READY = True
+
+# Every numeric/currency token class in one alternation, so a response is
+# scanned once. References and currency codes are zero-width lookaheads, so
+# they consume nothing and cannot hide a token that overlaps them (the "EUR"
+# in "EUREF:1" must not swallow the "REF:"); a date consumes only digits it
+# would otherwise report as digits. One finditer pass therefore sees the same
+# tokens as separate searches.
+_NUMERIC_CURRENCY_RE = re.compile(
+    r'(?P<date>\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})'
+    r'|(?=(?P<ref>(?:REF|Reference|ID):)\s*[A-Z0-9-])'
+    r'|(?=(?P<cur>EUR|USD|GBP|JPY|CHF)(?P<cur_amount>\s*[\d,.])?)'
+    r'|(?P<sym>[€$£¥])'
+    r'|(?P<digit>\d)'
+)
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+@lru_cache(maxsize=None)
+def _term_matcher(terms: Tuple[str, ...]) -> Tuple["re.Pattern", Dict[str, FrozenSet[str]]]:
+    """Build a single-pass matcher for a fixed tuple of lowercase terms.
+    
+    The pattern is a zero-width lookahead over all terms, longest first, so
+    finditer reports the longest term starting at every position. Any shorter
+    term matching at the same position is a prefix of it, so each term maps
+    to the set of terms that are its prefixes.
+    """
+    unique = sorted(set(terms), key=len, reverse=True)
+    pattern = re.compile('(?=(' + '|'.join(map(re.escape, unique)) + '))')
+    prefixes = {
+        term: frozenset(other for other in unique if term.startswith(other))
+        for term in unique
+    }
+    return pattern, prefixes
+
+def _find_terms(text_lower: str, terms: Tuple[str, ...]) -> FrozenSet[str]:
+    """Return which of the lowercase terms occur in the lowercase text."""
+    pattern, prefixes = _term_matcher(terms)
+    found = set()
+    for match in pattern.finditer(text_lower):
+        found |= prefixes[match.group(1)]
+    return frozenset(found)
+
+# Scores reported by evaluate_response, in score_matrix column order
+SCORE_NAMES = (
+    "technical_density",
+    "business_density",
+    "compliance_density",
+    "numeric_accuracy",
+    "currency_accuracy",
+    "readability"
+)
 
 def simple_tokenize(text: str) -> List[str]:
-    """Fallback tokenizer when NLTK fails."""
+    """Regex sentence tokenizer; the default, and the fallback when NLTK fails."""
     # Split on common sentence endings
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = _SENT_SPLIT_RE.split(text)
     # Filter out empty strings and normalize whitespace
     return [s.strip() for s in sentences if s.strip()]
 
@@ -66,66 +144,97 @@ class ISO20022Evaluator:
             'camt.053': ['reconciliation', 'audit', 'compliance', 'reporting', 'verification'],
             'pain.001': ['authorization', 'validation', 'compliance', 'verification', 'control']
         }
+        
+        # Lowercased, immutable copies of the term lists used for matching
+        self._technical_terms_lc = {
+            k: tuple(t.lower() for t in v) for k, v in self.technical_terms.items()
+        }
+        self._business_terms_lc = {
+            k: tuple(t.lower() for t in v) for k, v in self.business_terms.items()
+        }
+        self._compliance_terms_lc = {
+            k: tuple(t.lower() for t in v) for k, v in self.compliance_terms.items()
+        }
 
     def _tokenize_text(self, text: str) -> List[str]:
-        """Tokenize text into sentences with fallback."""
+        """Tokenize text into sentences, with NLTK only when USE_NLTK is set."""
+        if not USE_NLTK:
+            return simple_tokenize(text)
+        
+        import nltk
+        
+        _ensure_nltk()
         try:
             return nltk.sent_tokenize(text)
         except Exception as e:
             print(f"Warning: NLTK tokenization failed ({str(e)}), using fallback tokenizer")
             return simple_tokenize(text)
 
-    def _calculate_term_density(self, text: str, terms: List[str]) -> float:
-        """Calculate density of specific terms in text."""
-        if not text or not terms:
+    def _count_sentences(self, text: str) -> int:
+        """Count sentences without building the sentence list.
+        
+        Once the text is stripped, every regex split point separates two
+        non-empty sentences, so the count is the number of split points plus one.
+        """
+        if USE_NLTK:
+            return len(self._tokenize_text(text))
+        stripped = text.strip()
+        return len(_SENT_SPLIT_RE.findall(stripped)) + 1 if stripped else 0
+
+    def _calculate_term_density(self, text_lower: str, terms: Tuple[str, ...]) -> float:
+        """Calculate density of already-lowercased terms in already-lowercased text."""
+        if not text_lower or not terms:
             return 0.0
         
-        text_lower = text.lower()
-        term_count = sum(1 for term in terms if term.lower() in text_lower)
+        found = _find_terms(text_lower, terms)
+        term_count = sum(1 for term in terms if term in found)
         return term_count / len(terms) if terms else 0.0
 
-    def _check_numeric_accuracy(self, text: str) -> float:
-        """Check accuracy of numeric values in text."""
-        # Look for currency amounts with proper formatting
-        amount_pattern = r'(?:EUR|USD|GBP|JPY|CHF)\s*[\d,.]+|\d+(?:,\d{3})*(?:\.\d{2})?'
-        has_amounts = bool(re.search(amount_pattern, text))
+    def _check_numeric_currency(self, text: str) -> Tuple[float, float]:
+        """Score numeric and currency accuracy of text in a single scan.
         
-        # Look for dates in common formats
-        date_pattern = r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4}'
-        has_dates = bool(re.search(date_pattern, text))
+        Returns:
+            (numeric_accuracy, currency_accuracy)
         
-        # Look for reference numbers
-        ref_pattern = r'(?:REF|Reference|ID):\s*[A-Z0-9-]+'
-        has_refs = bool(re.search(ref_pattern, text))
+        Example:
+            >>> ISO20022Evaluator()._check_numeric_currency("Paid EUREF:123 today")
+            (0.6666666666666666, 0.6666666666666666)
+        """
+        has_digits = has_dates = has_refs = False
+        has_currency_codes = has_currency_amounts = has_symbols = False
         
-        # Calculate score based on presence of different numeric elements
-        score = sum([has_amounts, has_dates, has_refs]) / 3.0
-        return score
-
-    def _check_currency_accuracy(self, text: str) -> float:
-        """Check accuracy of currency handling in text."""
-        # Look for standard currency codes
-        currency_pattern = r'(?:EUR|USD|GBP|JPY|CHF)'
-        has_currency_codes = bool(re.search(currency_pattern, text))
-        
-        # Look for properly formatted amounts
-        amount_pattern = r'\d+(?:,\d{3})*(?:\.\d{2})?'
-        has_formatted_amounts = bool(re.search(amount_pattern, text))
+        for match in _NUMERIC_CURRENCY_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == 'digit':
+                has_digits = True
+            elif kind == 'date':
+                has_dates = has_digits = True
+            elif kind == 'ref':
+                has_refs = True
+            elif kind == 'sym':
+                has_symbols = True
+            else:
+                has_currency_codes = True
+                if match.group('cur_amount') is not None:
+                    has_currency_amounts = True
+            if has_digits and has_dates and has_refs and has_currency_codes and has_symbols:
+                break
         
-        # Look for currency symbols
-        symbol_pattern = r'[€$£¥]'
-        has_symbols = bool(re.search(symbol_pattern, text))
+        # Numeric: amounts (a currency code with an amount, or any number),
+        # dates and reference numbers
+        has_amounts = has_digits or has_currency_amounts
+        numeric_score = sum([has_amounts, has_dates, has_refs]) / 3.0
         
-        # Calculate score
-        score = sum([has_currency_codes, has_formatted_amounts, has_symbols]) / 3.0
-        return score
+        # Currency: codes, formatted amounts and symbols
+        currency_score = sum([has_currency_codes, has_digits, has_symbols]) / 3.0
+        return numeric_score, currency_score
 
     def evaluate_response(self, response: str, message_type: str) -> Dict:
         """Evaluate response quality for a given message type."""
         try:
             # Tokenize response
-            sentences = self._tokenize_text(response)
-            if not sentences:
+            sentence_count = self._count_sentences(response)
+            if not sentence_count:
                 return {
                     "status": "ERROR",
                     "scores": {},
@@ -133,27 +242,27 @@ class ISO20022Evaluator:
                     "improvement_areas": ["Empty or invalid response"]
                 }
 
-            # Calculate various metrics
+            # Calculate various metrics on one lowercased copy of the response
+            response_lower = response.lower()
             technical_density = self._calculate_term_density(
-                response,
-                self.technical_terms.get(message_type, [])
+                response_lower,
+                self._technical_terms_lc.get(message_type, ())
             )
             
             business_density = self._calculate_term_density(
-                response,
-                self.business_terms.get(message_type, [])
+                response_lower,
+                self._business_terms_lc.get(message_type, ())
             )
             
             compliance_density = self._calculate_term_density(
-                response,
-                self.compliance_terms.get(message_type, [])
+                response_lower,
+                self._compliance_terms_lc.get(message_type, ())
             )
             
-            numeric_accuracy = self._check_numeric_accuracy(response)
-            currency_accuracy = self._check_currency_accuracy(response)
+            numeric_accuracy, currency_accuracy = self._check_numeric_currency(response)
             
             # Calculate readability (simplified)
-            avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences)
+            avg_sentence_length = len(response.split()) / sentence_count
             readability_score = min(1.0, 2.0 / (1.0 + avg_sentence_length/20.0))
             
             # Identify improvement areas
@@ -182,7 +291,7 @@ class ISO20022Evaluator:
                     "readability": round(readability_score, 2)
                 },
                 "metrics": {
-                    "sentence_count": len(sentences),
+                    "sentence_count": sentence_count,
                     "avg_sentence_length": round(avg_sentence_length, 1),
                     "message_type": message_type
                 },
@@ -195,4 +304,41 @@ class ISO20022Evaluator:
                 "scores": {},
                 "metrics": {},
                 "improvement_areas": [f"Evaluation error: {str(e)}"]
-            } 
\ No newline at end of file
+            } 
+
+    def evaluate_responses(self, responses: Sequence[str], message_types: Sequence[str]) -> List[Dict]:
+        """Evaluate many responses in one call.
+        
+        Scoring is local, so a batch needs no round trips; identical
+        (response, message type) pairs are scored once and share the result.
+        
+        Args:
+            responses: Responses to evaluate
+            message_types: Message type of each response
+            
+        Returns:
+            One evaluate_response result per response, in order
+        """
+        if len(responses) != len(message_types):
+            raise ValueError(
+                f"Got {len(responses)} responses but {len(message_types)} message types"
+            )
+        
+        evaluations: Dict[Tuple[str, str], Dict] = {}
+        for pair in zip(responses, message_types):
+            if pair not in evaluations:
+                evaluations[pair] = self.evaluate_response(*pair)
+        return [evaluations[pair] for pair in zip(responses, message_types)]
+
+    def score_matrix(self, evaluations: Sequence[Dict]) -> np.ndarray:
+        """Stack evaluate_response results into one array for vectorized aggregation.
+        
+        Returns:
+            Array of shape (len(evaluations), len(SCORE_NAMES)), one row per
+            evaluation; rows of failed evaluations are NaN
+        """
+        scores = np.full((len(evaluations), len(SCORE_NAMES)), np.nan)
+        for row, evaluation in enumerate(evaluations):
+            if evaluation["status"] == "SUCCESS":
+                scores[row] = [evaluation["scores"][name] for name in SCORE_NAMES]
+        return scores
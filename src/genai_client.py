@@ -0,0 +1,92 @@
+"""Shared Gemini client built on the google-genai SDK.
+
+A single client is created per process and reused for every call so its
+HTTP connection pool is shared; async callers go through ``client.aio``
+rather than wrapping blocking calls in threads.
+"""
+
+import time
+from functools import lru_cache
+from typing import List
+
+from google import genai
+from google.genai import types
+
+from config import GEMINI_API_KEY, GEMINI_MODEL, GEMINI_TEMPERATURE
+
+# Batch job states after which polling stops
+_FINAL_BATCH_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED"
+}
+
+@lru_cache(maxsize=None)
+def get_client(api_key: str = GEMINI_API_KEY) -> genai.Client:
+    """Return the process-wide Gemini client for an API key, creating it on first use."""
+    return genai.Client(api_key=api_key)
+
+async def list_models_async() -> List[types.Model]:
+    """List the models available to the configured API key."""
+    pager = await get_client().aio.models.list()
+    return [model async for model in pager]
+
+async def generate_async(
+    prompt: str,
+    model: str = GEMINI_MODEL,
+    temperature: float = GEMINI_TEMPERATURE
+) -> str:
+    """Generate a completion for a single prompt without blocking the event loop."""
+    response = await get_client().aio.models.generate_content(
+        model=model,
+        contents=prompt,
+        config=types.GenerateContentConfig(temperature=temperature)
+    )
+    return response.text or ""
+
+def batch_generate(
+    prompts: List[str],
+    model: str = GEMINI_MODEL,
+    api_key: str = GEMINI_API_KEY,
+    poll_interval: float = 5.0,
+    max_poll_interval: float = 60.0
+) -> List[str]:
+    """Generate completions for many prompts as a single inline batch job.
+    
+    The Batch API costs about half as much per prompt, but a job can take
+    minutes to finish, so callers opt in per request. Responses are returned
+    in prompt order; a prompt that failed inside the batch yields an
+    "Error: ..." string.
+    """
+    if not prompts:
+        return []
+    
+    client = get_client(api_key)
+    config = types.GenerateContentConfig(temperature=GEMINI_TEMPERATURE)
+    job = client.batches.create(
+        model=model,
+        src=[
+            {
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "config": config
+            }
+            for prompt in prompts
+        ]
+    )
+    
+    # Poll with exponential backoff until the job reaches a final state
+    delay = poll_interval
+    while job.state is None or job.state.name not in _FINAL_BATCH_STATES:
+        time.sleep(delay)
+        delay = min(delay * 2, max_poll_interval)
+        job = client.batches.get(name=job.name)
+    
+    if job.state.name not in ("JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED"):
+        raise RuntimeError(f"Gemini batch job {job.name} finished in state {job.state.name}")
+    
+    return [
+        (item.response.text or "") if item.response else f"Error: {item.error}"
+        for item in job.dest.inlined_responses
+    ]
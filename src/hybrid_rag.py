@@ -1,13 +1,77 @@
 """Hybrid RAG implementation combining Simple, Context-Enriched, and Reranker RAGs."""
 
+import asyncio
+import re
 from typing import Dict, List, Optional, Tuple
+import httpx
 import numpy as np
-from .rag_implementations import ISO20022RAG
+from .rag_implementations import DEFAULT_SUMMARY_MODEL, ISO20022RAG
+
+# Fixed order of the RAG methods in every weight/score vector
+RAG_METHODS = ('simple', 'context', 'reranker')
+
+# Per-method weight multipliers applied for each kind of query
+_COMPLIANCE_ADJUSTMENT = np.array([0.7, 1.3, 1.0])   # Increase context weight
+_DETAIL_ADJUSTMENT = np.array([0.8, 1.0, 1.2])       # Increase reranker weight
+_SUMMARY_ADJUSTMENT = np.array([1.3, 0.8, 0.9])      # Increase simple weight
+
+# Confidence checks, compiled once so each stops at its first match
+_DIGIT_RE = re.compile(r'\d')
+_CURR_RE = re.compile(r'USD|EUR|GBP|JPY|CHF')
+_STATUS_RE = re.compile(r'ACCP|ACSC|RJCT', re.IGNORECASE)
+
+# Response feature bits scored by _calculate_confidence
+_F_AMOUNTS = 1 << 0
+_F_CURRENCY = 1 << 1
+_F_PARTIES = 1 << 2
+_F_STATUS_CODE = 1 << 3
+_F_TRANSFER = 1 << 4
+_F_PAYMENT = 1 << 5
+_F_STATUS = 1 << 6
+_F_ORIGINAL = 1 << 7
+_F_STATEMENT = 1 << 8
+_F_BALANCE = 1 << 9
+_F_INITIATION = 1 << 10
+
+# Lowercase keywords and the feature bit each one sets
+_KEYWORD_FEATURES = (
+    ('transfer', _F_TRANSFER),
+    ('payment', _F_PAYMENT),
+    ('status', _F_STATUS),
+    ('original', _F_ORIGINAL),
+    ('statement', _F_STATEMENT),
+    ('balance', _F_BALANCE),
+    ('initiation', _F_INITIATION)
+)
+
+# Features checked by each message type's specific score: (mask, feature count)
+_TYPE_FEATURE_MASKS = {
+    msg_type: (mask, bin(mask).count('1'))
+    for msg_type, mask in {
+        'pacs.008': _F_TRANSFER | _F_PAYMENT | _F_AMOUNTS | _F_CURRENCY,
+        'pacs.002': _F_STATUS | _F_ORIGINAL | _F_STATUS_CODE,
+        'camt.053': _F_STATEMENT | _F_BALANCE | _F_AMOUNTS | _F_CURRENCY,
+        'pain.001': _F_INITIATION | _F_PAYMENT | _F_AMOUNTS | _F_PARTIES
+    }.items()
+}
 
 class HybridRAG(ISO20022RAG):
-    def __init__(self, openai_key: Optional[str] = None, gemini_key: Optional[str] = None):
-        """Initialize Hybrid RAG with API keys."""
-        super().__init__(openai_key=openai_key, gemini_key=gemini_key)
+    def __init__(
+        self,
+        openai_key: Optional[str] = None,
+        gemini_key: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        use_cache: bool = True,
+        http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+    ):
+        """Initialize Hybrid RAG with API keys, optional response caching and shared HTTP clients."""
+        super().__init__(
+            openai_key=openai_key,
+            gemini_key=gemini_key,
+            cache_path=cache_path,
+            use_cache=use_cache,
+            http_clients=http_clients
+        )
         
         # Weights for different RAG methods (can be adjusted based on performance)
         self.weights = {
@@ -46,43 +110,43 @@ class HybridRAG(ISO20022RAG):
                 'reranker': 0.30
             }
         }
+        
+        # Vector forms of the tables above, in RAG_METHODS order
+        self._weight_vector = np.array([self.weights[m] for m in RAG_METHODS])
+        self._threshold_vector = np.array([self.thresholds[m] for m in RAG_METHODS])
+        self._message_type_index = {
+            msg_type: i for i, msg_type in enumerate(self.message_type_weights)
+        }
+        self._message_type_matrix = np.array([
+            [weights[m] for m in RAG_METHODS]
+            for weights in self.message_type_weights.values()
+        ])
 
     def _calculate_confidence(self, response: str, message_type: str) -> float:
         """Calculate confidence score for a response."""
-        # Basic confidence metrics
-        has_amounts = any(char.isdigit() for char in response)
-        has_currency = any(curr in response for curr in ['USD', 'EUR', 'GBP', 'JPY', 'CHF'])
-        has_parties = any(term in response.lower() for term in ['sender', 'receiver', 'debtor', 'creditor', 'bank'])
+        # Basic confidence metrics; lowercase the response once for every check
+        response_lower = response.lower()
+        has_amounts = bool(_DIGIT_RE.search(response))
+        has_currency = bool(_CURR_RE.search(response))
+        has_parties = any(term in response_lower for term in ['sender', 'receiver', 'debtor', 'creditor', 'bank'])
+        
+        # Message type specific checks: set the feature bits the type needs,
+        # then score the fraction of its features present
+        type_mask, type_feature_count = _TYPE_FEATURE_MASKS.get(message_type, (0, 0))
+        features = (
+            (_F_AMOUNTS if has_amounts else 0)
+            | (_F_CURRENCY if has_currency else 0)
+            | (_F_PARTIES if has_parties else 0)
+        )
+        if type_mask & _F_STATUS_CODE and _STATUS_RE.search(response):
+            features |= _F_STATUS_CODE
+        for keyword, flag in _KEYWORD_FEATURES:
+            if type_mask & flag and keyword in response_lower:
+                features |= flag
         
-        # Message type specific checks
         type_specific_score = 0.0
-        if message_type == 'pacs.008':
-            type_specific_score = sum([
-                'transfer' in response.lower(),
-                'payment' in response.lower(),
-                has_amounts,
-                has_currency
-            ]) / 4.0
-        elif message_type == 'pacs.002':
-            type_specific_score = sum([
-                'status' in response.lower(),
-                'original' in response.lower(),
-                any(status in response.upper() for status in ['ACCP', 'ACSC', 'RJCT'])
-            ]) / 3.0
-        elif message_type == 'camt.053':
-            type_specific_score = sum([
-                'statement' in response.lower(),
-                'balance' in response.lower(),
-                has_amounts,
-                has_currency
-            ]) / 4.0
-        elif message_type == 'pain.001':
-            type_specific_score = sum([
-                'initiation' in response.lower(),
-                'payment' in response.lower(),
-                has_amounts,
-                has_parties
-            ]) / 4.0
+        if type_feature_count:
+            type_specific_score = bin(features & type_mask).count('1') / type_feature_count
             
         # Combine scores
         base_score = sum([
@@ -95,89 +159,129 @@ class HybridRAG(ISO20022RAG):
         
         return (base_score * 0.6) + (type_specific_score * 0.4)
 
-    def _adjust_weights(self, message_type: str, query: Optional[str] = None) -> Dict[str, float]:
-        """Adjust weights based on message type and query."""
+    def _adjust_weights(self, message_type: str, query: Optional[str] = None) -> np.ndarray:
+        """Adjust weights based on message type and query.
+        
+        Returns:
+            Normalized weights in RAG_METHODS order
+        """
         # Start with message type specific weights
-        weights = self.message_type_weights.get(message_type, self.weights)
+        type_idx = self._message_type_index.get(message_type)
+        if type_idx is None:
+            weights = self._weight_vector.copy()
+        else:
+            weights = self._message_type_matrix[type_idx].copy()
         
         if query:
             query_lower = query.lower()
             
             # Adjust for compliance/regulatory queries
             if any(term in query_lower for term in ['compliance', 'regulatory', 'regulation', 'aml', 'kyc']):
-                weights = {
-                    'simple': weights['simple'] * 0.7,
-                    'context': weights['context'] * 1.3,  # Increase context weight
-                    'reranker': weights['reranker']
-                }
+                weights *= _COMPLIANCE_ADJUSTMENT
             
             # Adjust for specific detail queries
             elif any(term in query_lower for term in ['specific', 'detail', 'explain', 'why', 'how']):
-                weights = {
-                    'simple': weights['simple'] * 0.8,
-                    'context': weights['context'],
-                    'reranker': weights['reranker'] * 1.2  # Increase reranker weight
-                }
+                weights *= _DETAIL_ADJUSTMENT
             
             # Adjust for quick summary queries
             elif any(term in query_lower for term in ['quick', 'summary', 'brief', 'short']):
-                weights = {
-                    'simple': weights['simple'] * 1.3,  # Increase simple weight
-                    'context': weights['context'] * 0.8,
-                    'reranker': weights['reranker'] * 0.9
-                }
+                weights *= _SUMMARY_ADJUSTMENT
         
         # Normalize weights
-        total = sum(weights.values())
-        return {k: v/total for k, v in weights.items()}
+        return weights / weights.sum()
 
     def hybrid_rag_summary(
         self,
         message_data: Dict,
-        model_name: str = "gpt-4",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
         query: Optional[str] = None
     ) -> Tuple[str, Dict]:
         """Generate summary using hybrid approach combining all RAG methods."""
+        # Build the prompt of every method the shortcut cannot answer, then
+        # complete them in one batch
+        responses, prompts = self._method_requests(message_data, query)
+        responses.update(zip(prompts, self._batch_complete(list(prompts.values()), model_name)))
+        return self._select_response(message_data, query, responses)
+
+    async def hybrid_rag_summary_async(
+        self,
+        message_data: Dict,
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: Optional[str] = None
+    ) -> Tuple[str, Dict]:
+        """Async counterpart of hybrid_rag_summary; the method calls run concurrently on the event loop."""
+        responses, prompts = self._method_requests(message_data, query)
+        completed = await asyncio.gather(
+            *(self._call_llm_async(prompt, model_name) for prompt in prompts.values())
+        )
+        responses.update(zip(prompts, completed))
+        return self._select_response(message_data, query, responses)
+
+    def _method_requests(
+        self,
+        message_data: Dict,
+        query: Optional[str]
+    ) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Split the RAG methods into those answered without the LLM and the rest.
+        
+        Returns:
+            (shortcut answers, prompts of the remaining methods), both keyed
+            by method name
+        """
+        answers, prompts = {}, {}
+        for method in RAG_METHODS:
+            answer = self._shortcut_answer(method, message_data, query)
+            if answer is None:
+                prompts[method] = self._prompt_builder(method)(message_data, query)
+            else:
+                answers[method] = answer
+        return answers, prompts
+
+    def _select_response(
+        self,
+        message_data: Dict,
+        query: Optional[str],
+        responses: Dict[str, str]
+    ) -> Tuple[str, Dict]:
+        """Pick the best method response by weighted confidence.
+        
+        Args:
+            message_data: Parsed message data the responses describe
+            query: Optional query the responses answer
+            responses: Response of each RAG method, keyed by method name
+            
+        Returns:
+            (best response, metadata)
+        """
         # Get adjusted weights
         weights = self._adjust_weights(message_data['message_type'], query)
         
-        # Get responses from each method
-        responses = {
-            'simple': self.simple_rag_summary(message_data, model_name, query),
-            'context': self.context_enriched_rag_summary(message_data, model_name, query),
-            'reranker': self.reranker_rag_summary(message_data, model_name, query)
-        }
-        
         # Calculate confidence scores
         confidences = {
             method: self._calculate_confidence(response, message_data['message_type'])
             for method, response in responses.items()
         }
         
-        # Adjust weights based on confidence scores
-        for method, confidence in confidences.items():
-            if confidence < self.thresholds[method]:
-                weights[method] *= (confidence / self.thresholds[method])
-        
-        # Normalize weights again
-        total_weight = sum(weights.values())
-        weights = {k: v/total_weight for k, v in weights.items()}
+        # Scale down weights of methods below their confidence threshold,
+        # then normalize again (kept as-is if every confidence is zero)
+        confidence_vector = np.array([confidences[m] for m in RAG_METHODS])
+        scaled = weights * np.minimum(1.0, confidence_vector / self._threshold_vector)
+        total_weight = scaled.sum()
+        if total_weight > 0:
+            weights = scaled / total_weight
         
         # Select best response based on confidence and weights
-        weighted_scores = {
-            method: confidence * weights[method]
-            for method, confidence in confidences.items()
-        }
-        
-        best_method = max(weighted_scores.items(), key=lambda x: x[1])[0]
+        score_vector = confidence_vector * weights
+        best_method = RAG_METHODS[int(np.argmax(score_vector))]
         best_response = responses[best_method]
         
         # Return best response and metadata
         metadata = {
             'selected_method': best_method,
             'confidence_scores': confidences,
-            'final_weights': weights,
-            'weighted_scores': weighted_scores
+            'final_weights': dict(zip(RAG_METHODS, weights.tolist())),
+            'weighted_scores': dict(zip(RAG_METHODS, score_vector.tolist())),
+            'responses': responses
         }
         
         return best_response, metadata
@@ -185,25 +289,34 @@ class HybridRAG(ISO20022RAG):
     def analyze_message(
         self,
         message_data: Dict,
-        model_name: str = "gpt-4",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
         query: Optional[str] = None
     ) -> Dict:
         """Comprehensive message analysis using hybrid approach."""
         # Get summary and metadata
         summary, metadata = self.hybrid_rag_summary(message_data, model_name, query)
+        return self._analysis(message_data, summary, metadata)
+
+    async def analyze_message_async(
+        self,
+        message_data: Dict,
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: Optional[str] = None
+    ) -> Dict:
+        """Async counterpart of analyze_message."""
+        summary, metadata = await self.hybrid_rag_summary_async(message_data, model_name, query)
+        return self._analysis(message_data, summary, metadata)
+
+    def _analysis(self, message_data: Dict, summary: str, metadata: Dict) -> Dict:
+        """Assemble the analyze_message result from a hybrid summary and its metadata."""
+        # Reuse the method responses already produced by hybrid_rag_summary
+        all_responses = {**metadata['responses'], 'hybrid': summary}
         
-        # Get all responses for comparison
-        all_responses = {
-            'simple': self.simple_rag_summary(message_data, model_name, query),
-            'context': self.context_enriched_rag_summary(message_data, model_name, query),
-            'reranker': self.reranker_rag_summary(message_data, model_name, query),
-            'hybrid': summary
-        }
-        
-        # Calculate confidence scores for all responses
+        # Reuse the confidence scores computed by hybrid_rag_summary; the hybrid
+        # summary is the selected method's response, so it shares that score
         confidence_scores = {
-            method: self._calculate_confidence(response, message_data['message_type'])
-            for method, response in all_responses.items()
+            **metadata['confidence_scores'],
+            'hybrid': metadata['confidence_scores'][metadata['selected_method']]
         }
         
         return {
@@ -213,4 +326,4 @@ class HybridRAG(ISO20022RAG):
             'metadata': metadata,
             'message_type': message_data['message_type'],
             'analysis_method': 'hybrid_rag'
-        } 
\ No newline at end of file
+        }
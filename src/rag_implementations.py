@@ -1,9 +1,23 @@
 """RAG implementations for ISO 20022 message processing."""
 
+import asyncio
+import hashlib
+import heapq
+import importlib.util
+import json
 import os
-from typing import Dict, List, Optional
-import xml.etree.ElementTree as ET
-from openai import OpenAI
+import re
+import shelve
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import httpx
+from lxml import etree as ET
+from openai import AsyncOpenAI, OpenAI
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
@@ -15,23 +29,684 @@ XML_NAMESPACES = {
     'pain.001': {'ns': 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.11'}
 }
 
+# Message type for each document namespace, used to detect the type from the root tag
+_NAMESPACE_TO_TYPE = {ns['ns']: msg_type for msg_type, ns in XML_NAMESPACES.items()}
+
+# XPath expressions for the fields extracted from each message type, in the
+# order they appear in the parsed message data. They select text or attribute
+# values directly so libxml2 returns strings.
+_COMMON_FIELD_XPATHS = {
+    'message_id': './/ns:MsgId/text()',
+    'created_at': './/ns:CreDtTm/text()'
+}
+_FIELD_XPATHS = {
+    'pacs.008': {
+        'amount': './/ns:TtlIntrBkSttlmAmt/text()',
+        'currency': './/ns:TtlIntrBkSttlmAmt/@Ccy',
+        'debtor_name': './/ns:Dbtr/ns:Nm/text()',
+        'creditor_name': './/ns:Cdtr/ns:Nm/text()',
+        'debtor_bank': './/ns:DbtrAgt//ns:BICFI/text()',
+        'creditor_bank': './/ns:CdtrAgt//ns:BICFI/text()'
+    },
+    'pacs.002': {
+        'original_message_id': './/ns:OrgnlMsgId/text()',
+        'original_message_type': './/ns:OrgnlMsgNmId/text()',
+        'group_status': './/ns:GrpSts/text()'
+    },
+    'camt.053': {
+        'statement_id': './/ns:Stmt/ns:Id/text()',
+        'account_id': './/ns:Stmt/ns:Acct/ns:Id/ns:IBAN/text()',
+        'balance_amount': './/ns:Stmt/ns:Bal/ns:Amt/text()',
+        'balance_currency': './/ns:Stmt/ns:Bal/ns:Amt/@Ccy'
+    },
+    'pain.001': {
+        'initiator_name': './/ns:InitgPty/ns:Nm/text()',
+        'payment_method': './/ns:PmtInf/ns:PmtMtd/text()',
+        'execution_date': './/ns:PmtInf/ns:ReqdExctnDt/text()',
+        'debtor_name': './/ns:Dbtr/ns:Nm/text()',
+        'debtor_account': './/ns:DbtrAcct/ns:Id/ns:IBAN/text()',
+        'amount': './/ns:InstdAmt/text()',
+        'currency': './/ns:InstdAmt/@Ccy',
+        'creditor_name': './/ns:Cdtr/ns:Nm/text()',
+        'creditor_account': './/ns:CdtrAcct/ns:Id/ns:IBAN/text()'
+    }
+}
+_OPTIONAL_FIELD_XPATHS = {
+    'pacs.008': {
+        'charge_bearer': './/ns:ChrgBr/text()',
+        'purpose': './/ns:RmtInf/ns:Ustrd/text()'
+    }
+}
+_ENTRY_FIELD_XPATHS = {
+    'amount': './/ns:Amt/text()',
+    'currency': './/ns:Amt/@Ccy',
+    'credit_debit': './/ns:CdtDbtInd/text()',
+    'status': './/ns:Sts/text()',
+    'booking_date': './/ns:BookgDt/ns:DtTm/text()'
+}
+# The same entry fields for every statement entry at once: each expression
+# yields at most one value per entry, in entry order
+_STATEMENT_ENTRY_FIELD_XPATHS = {
+    'amount': './/ns:Stmt/ns:Ntry/descendant::ns:Amt[1]/text()',
+    'currency': './/ns:Stmt/ns:Ntry/descendant::ns:Amt[1]/@Ccy',
+    'credit_debit': './/ns:Stmt/ns:Ntry/descendant::ns:CdtDbtInd[1]/text()',
+    'status': './/ns:Stmt/ns:Ntry/descendant::ns:Sts[1]/text()',
+    'booking_date': './/ns:Stmt/ns:Ntry/descendant::ns:DtTm[parent::ns:BookgDt][1]/text()'
+}
+
+# Namespaces are kept on the parsed tree: libxml2 matches names by interned
+# pointer, so stripping '{ns}' from every tag in Python would cost more than
+# it could save on lookups.
+def _compile_xpaths(msg_type: str, exprs: Dict[str, str]) -> Dict[str, ET.XPath]:
+    """Compile field XPaths once against a message type's namespace."""
+    return {
+        field: ET.XPath(expr, namespaces=XML_NAMESPACES[msg_type], smart_strings=False)
+        for field, expr in exprs.items()
+    }
+
+# A field's element XPath and the attribute read from it (None reads the text)
+FieldXPath = Tuple[ET.XPath, Optional[str]]
+
+def _compile_field_xpaths(msg_type: str, exprs: Dict[str, str]) -> Dict[str, FieldXPath]:
+    """Compile field XPaths to select the field's element rather than its value.
+    
+    Each expression ends in /text() or /@attr. Selecting the element lets an
+    element that is present but empty read as None, as Element.text does,
+    while a missing element is told apart by matching nothing.
+    """
+    fields = {}
+    for field, expr in exprs.items():
+        path, _, step = expr.rpartition('/')
+        attribute = step[1:] if step.startswith('@') else None
+        fields[field] = (
+            ET.XPath(path, namespaces=XML_NAMESPACES[msg_type], smart_strings=False),
+            attribute
+        )
+    return fields
+
+def _field_value(element: ET._Element, attribute: Optional[str]) -> Optional[str]:
+    """Read a field from its element: the attribute if given, else the text (None when empty)."""
+    return element.get(attribute) if attribute else element.text
+
+def _required_field(root: ET._Element, field: str, field_xpath: FieldXPath) -> Optional[str]:
+    """Read a required field, raising ValueError only when its element is missing."""
+    xpath, attribute = field_xpath
+    elements = xpath(root)
+    if not elements:
+        raise ValueError(f"Missing required field '{field}'")
+    return _field_value(elements[0], attribute)
+
+# Compiled evaluators, built once at import
+COMPILED_XPATHS = {
+    msg_type: _compile_field_xpaths(msg_type, {**_COMMON_FIELD_XPATHS, **fields})
+    for msg_type, fields in _FIELD_XPATHS.items()
+}
+COMPILED_OPTIONAL_XPATHS = {
+    msg_type: _compile_field_xpaths(msg_type, fields)
+    for msg_type, fields in _OPTIONAL_FIELD_XPATHS.items()
+}
+
+# Separator for record XPaths; a private-use character that ISO 20022 data
+# does not contain (a value that did would just take the per-field path)
+_FIELD_SEPARATOR = "\ue000"
+
+def _compile_record_xpath(msg_type: str, exprs: Dict[str, str]) -> Tuple[Tuple[str, ...], ET.XPath]:
+    """Compile field XPaths into one expression returning every value, separator-joined.
+    
+    Each field contributes the string value of its first match, so a single
+    evaluation yields what evaluating each expression and taking [0] would.
+    """
+    values = f", '{_FIELD_SEPARATOR}', ".join(f"string(({expr})[1])" for expr in exprs.values())
+    xpath = ET.XPath(f"concat({values})", namespaces=XML_NAMESPACES[msg_type], smart_strings=False)
+    return tuple(exprs), xpath
+
+# Required fields of each message type as a single record XPath
+COMPILED_RECORD_XPATHS = {
+    msg_type: _compile_record_xpath(msg_type, {**_COMMON_FIELD_XPATHS, **fields})
+    for msg_type, fields in _FIELD_XPATHS.items()
+}
+_STATEMENT_ENTRIES_XPATH = ET.XPath('.//ns:Stmt/ns:Ntry', namespaces=XML_NAMESPACES['camt.053'])
+COMPILED_ENTRY_XPATHS = _compile_field_xpaths('camt.053', _ENTRY_FIELD_XPATHS)
+COMPILED_STATEMENT_ENTRY_XPATHS = _compile_xpaths('camt.053', _STATEMENT_ENTRY_FIELD_XPATHS)
+
+# Parser reused by every parse_iso_message call in a thread; entity expansion
+# and network access are disabled since messages come from outside
+_PARSER_STATE = threading.local()
+
+def _xml_parser() -> ET.XMLParser:
+    """Return this thread's XML parser, creating it on first use.
+    
+    lxml parsers must not be shared between threads, so each thread reuses
+    its own. ID collection and ignorable whitespace are skipped since the
+    field XPaths never use them.
+    """
+    parser = getattr(_PARSER_STATE, 'parser', None)
+    if parser is None:
+        parser = _PARSER_STATE.parser = ET.XMLParser(
+            resolve_entities=False,
+            no_network=True,
+            collect_ids=False,
+            remove_blank_text=True
+        )
+    return parser
+
+# Bytes fed at a time when sniffing the message type from the root start tag
+_SNIFF_CHUNK_SIZE = 512
+
+# Simple RAG knowledge base: one read-only retrieval template per message type
+ISO_KNOWLEDGE_BASE = tuple(MappingProxyType(entry) for entry in [
+    {
+        "field": "pacs.008",
+        "description": "Customer credit transfer message",
+        "key_fields": ["MsgId", "CreDtTm", "TtlIntrBkSttlmAmt", "Dbtr", "Cdtr"],
+        "summary_template": "Payment of {amount} {currency} was made on {created_at} from {debtor_name} to {creditor_name}."
+    },
+    {
+        "field": "pacs.002",
+        "description": "Payment status report message",
+        "key_fields": ["MsgId", "CreDtTm", "OrgnlMsgId", "GrpSts"],
+        "summary_template": "Status report for message {original_message_id}: {group_status} at {created_at}."
+    },
+    {
+        "field": "camt.053",
+        "description": "Bank statement message",
+        "key_fields": ["MsgId", "CreDtTm", "StmtId", "Bal"],
+        "summary_template": "Statement {statement_id} with balance {balance_amount} {balance_currency} at {created_at}."
+    },
+    {
+        "field": "pain.001",
+        "description": "Payment initiation message",
+        "key_fields": ["MsgId", "CreDtTm", "InitgPty", "Dbtr", "Cdtr"],
+        "summary_template": "Payment initiation from {debtor_name} to {creditor_name} for {amount} {currency} on {created_at}."
+    }
+])
+_KB_BY_TYPE = MappingProxyType({entry["field"]: entry for entry in ISO_KNOWLEDGE_BASE})
+
+# Context-Enriched RAG context per message type: description, key-point
+# bullets (formatted against the parsed message) and compliance checks
+_MESSAGE_CONTEXTS = {
+    'pacs.008': {
+        "description": "Customer credit transfer",
+        "key_points": (
+            "Transfer amount: {amount} {currency}",
+            "From: {debtor_name} (Bank: {debtor_bank})",
+            "To: {creditor_name} (Bank: {creditor_bank})",
+            "Date: {created_at}"
+        ),
+        "compliance": (
+            "Verify sender and receiver details",
+            "Check for valid bank identifiers",
+            "Ensure positive amount in valid currency"
+        )
+    },
+    'pacs.002': {
+        "description": "Payment status report",
+        "key_points": (
+            "Status: {group_status}",
+            "Original message: {original_message_id}",
+            "Message type: {original_message_type}",
+            "Date: {created_at}"
+        ),
+        "compliance": (
+            "Valid status code",
+            "Reference to original message",
+            "Proper status reason if rejected"
+        )
+    },
+    'camt.053': {
+        "description": "Bank statement",
+        "key_points": (
+            "Statement ID: {statement_id}",
+            "Account: {account_id}",
+            "Balance: {balance_amount} {balance_currency}",
+            "Date: {created_at}"
+        ),
+        "compliance": (
+            "Valid account identifier",
+            "Balance calculation accuracy",
+            "Transaction details completeness"
+        )
+    },
+    'pain.001': {
+        "description": "Payment initiation",
+        "key_points": (
+            "Amount: {amount} {currency}",
+            "Initiator: {initiator_name}",
+            "From: {debtor_name} ({debtor_account})",
+            "To: {creditor_name} ({creditor_account})",
+            "Date: {created_at}"
+        ),
+        "compliance": (
+            "Valid account numbers",
+            "Authorized initiator",
+            "Sufficient funds check"
+        )
+    }
+}
+
+def _bullets(lines: Sequence[str]) -> str:
+    """Join lines into a bulleted block."""
+    return "\n".join(f"• {line}" for line in lines)
+
+# Pre-joined bullet templates, so a prompt needs a single format_map call
+_CONTEXT_TEMPLATES = MappingProxyType({
+    msg_type: MappingProxyType({
+        "description": context["description"],
+        "key_points": _bullets(context["key_points"]),
+        "compliance": _bullets(context["compliance"])
+    })
+    for msg_type, context in _MESSAGE_CONTEXTS.items()
+})
+
+class _FieldsOrNA(dict):
+    """Message fields for str.format_map, rendering missing fields as 'N/A'."""
+    def __missing__(self, key: str) -> str:
+        return 'N/A'
+
+def _message_context(message_data: Dict) -> Dict[str, str]:
+    """Build the Context-Enriched RAG context for one parsed message."""
+    template = _CONTEXT_TEMPLATES.get(message_data['message_type'])
+    if template is None:
+        return {
+            "description": "Unknown message type",
+            "key_points": _bullets([
+                f"Message ID: {message_data['message_id']}",
+                f"Date: {message_data['created_at']}"
+            ]),
+            "compliance": _bullets(["Standard message validation"])
+        }
+    
+    return {
+        "description": template["description"],
+        "key_points": template["key_points"].format_map(_FieldsOrNA(message_data)),
+        "compliance": template["compliance"]
+    }
+
+# Reranker RAG context chunks as (relevance, content template): the chunks
+# common to every message, then the message type specific ones
+_COMMON_RERANKER_CHUNKS = (
+    (0.5, "Message ID: {message_id}"),
+    (0.6, "Created at: {created_at}")
+)
+_RERANKER_CHUNKS = {
+    'pacs.008': (
+        (0.9, "Payment transaction: {amount} {currency}"),
+        (0.8, "Parties involved: {debtor_name} → {creditor_name}"),
+        (0.7, "Banks: {debtor_bank} → {creditor_bank}")
+    ),
+    'pacs.002': (
+        (0.9, "Status: {group_status}"),
+        (0.8, "Original message: {original_message_id} ({original_message_type})")
+    ),
+    'camt.053': (
+        (0.7, "Statement ID: {statement_id}"),
+        (0.8, "Account: {account_id}"),
+        (0.9, "Balance: {balance_amount} {balance_currency}")
+    ),
+    'pain.001': (
+        (0.9, "Payment initiation: {amount} {currency}"),
+        (0.7, "Initiator: {initiator_name}"),
+        (0.8, "From: {debtor_name} ({debtor_account})"),
+        (0.8, "To: {creditor_name} ({creditor_account})")
+    )
+}
+# camt.053 transaction chunks follow the fixed ones; the first has this
+# relevance and each later transaction 0.1 less
+_TRANSACTION_RELEVANCE = 0.6
+_TRANSACTION_CHUNK = "Transaction {index}: {amount} {currency} ({credit_debit})"
+
+# Number of chunks the Reranker RAG prompt uses
+RERANKER_TOP_K = 3
+
+# Fixed chunks ranked once at import; ties keep declaration order like a stable sort
+_RANKED_COMMON_CHUNKS = tuple(heapq.nlargest(RERANKER_TOP_K, _COMMON_RERANKER_CHUNKS, key=itemgetter(0)))
+_RANKED_RERANKER_CHUNKS = MappingProxyType({
+    msg_type: tuple(heapq.nlargest(RERANKER_TOP_K, _COMMON_RERANKER_CHUNKS + chunks, key=itemgetter(0)))
+    for msg_type, chunks in _RERANKER_CHUNKS.items()
+})
+
+def _reranked_chunks(message_data: Dict) -> List[str]:
+    """Return the content of the most relevant Reranker RAG chunks, best first."""
+    ranked = _RANKED_RERANKER_CHUNKS.get(message_data['message_type'], _RANKED_COMMON_CHUNKS)
+    
+    # Transactions only matter if one can outrank a chunk already selected
+    transactions = message_data.get('transactions') if message_data['message_type'] == 'camt.053' else None
+    if transactions and (len(ranked) < RERANKER_TOP_K or _TRANSACTION_RELEVANCE > ranked[-1][0]):
+        transaction_chunks = (
+            (_TRANSACTION_RELEVANCE - i * 0.1, _TRANSACTION_CHUNK.format(index=i + 1, **txn))
+            for i, txn in enumerate(transactions)
+        )
+        candidates = [(relevance, template.format_map(message_data)) for relevance, template in ranked]
+        return [content for _, content in heapq.nlargest(
+            RERANKER_TOP_K, [*candidates, *transaction_chunks], key=itemgetter(0)
+        )]
+    
+    return [template.format_map(message_data) for _, template in ranked]
+
+# Simple factual questions answered straight from the parsed message, as
+# (question pattern, required fields, answer template). Patterns must match
+# the whole question so anything more involved still goes to the LLM.
+_TEMPLATE_INTENTS = tuple(
+    (re.compile(rf"\s*(?:{pattern})\s*\??\s*", re.IGNORECASE), fields, answer)
+    for pattern, fields, answer in (
+        (
+            r"(what(?:'s| is) the )?(transfer |payment |transaction )?amount|how much(?: was| is)?(?: (?:paid|sent|transferred))?",
+            ('amount', 'currency'),
+            "The amount is {amount} {currency}."
+        ),
+        (
+            r"who(?:'s| is) the (sender|debtor|payer)|who sent (it|this|the payment)",
+            ('debtor_name',),
+            "The sender (debtor) is {debtor_name}."
+        ),
+        (
+            r"who(?:'s| is) the (receiver|recipient|creditor|beneficiary|payee)|who receive[sd] (it|this|the payment)",
+            ('creditor_name',),
+            "The receiver (creditor) is {creditor_name}."
+        ),
+        (
+            r"what(?:'s| is) the (payment |group )?status",
+            ('group_status',),
+            "The payment status is {group_status}."
+        ),
+        (
+            r"what(?:'s| is) the (account |closing |statement )?balance",
+            ('balance_amount', 'balance_currency'),
+            "The balance is {balance_amount} {balance_currency}."
+        ),
+        (
+            r"when was (it|this|this message|the message) (created|sent)",
+            ('created_at',),
+            "The message was created at {created_at}."
+        )
+    )
+)
+
+def _template_answer(message_data: Dict, query: str) -> Optional[str]:
+    """Answer a simple factual question from the message data, or return None."""
+    for pattern, fields, answer in _TEMPLATE_INTENTS:
+        if pattern.fullmatch(query):
+            if all(message_data.get(field) for field in fields):
+                return answer.format_map(message_data)
+            return None
+    return None
+
 # Constants for Gemini model configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-pro"
 GEMINI_TEMPERATURE = 0.3
 GPT_TEMPERATURE = 0.3
 
+# Gemini models to use, best first, when a configured one is not available
+GEMINI_MODEL_PREFERENCE = ("gemini-1.5-pro", "gemini-1.5-flash", "gemini-pro")
+
+# Timeout in seconds for the one-off Gemini model listing done at init
+GEMINI_LIST_TIMEOUT = 10.0
+
+@lru_cache(maxsize=None)
+def _list_gemini_models(api_key: str) -> frozenset:
+    """List the Gemini models that support generateContent, once per API key.
+    
+    A failed listing raises, and lru_cache does not cache exceptions, so the
+    next call for that key tries again.
+    """
+    genai.configure(api_key=api_key)
+    models = genai.list_models(request_options={"timeout": GEMINI_LIST_TIMEOUT, "retry": None})
+    return frozenset(
+        model.name.split('/')[-1]
+        for model in models
+        if 'generateContent' in model.supported_generation_methods
+    )
+
+def _available_gemini_models(api_key: str) -> Optional[frozenset]:
+    """List the Gemini models that support generateContent.
+    
+    Returns None when the listing fails, in which case the configured models
+    are used as-is.
+    """
+    try:
+        return _list_gemini_models(api_key)
+    except Exception as e:
+        print(f"Could not list Gemini models: {str(e)}")
+        return None
+
+def _pick_gemini_model(preferred: str, available: Optional[frozenset]) -> str:
+    """Return the preferred Gemini model if available, else the best available one."""
+    if available is None or preferred in available:
+        return preferred
+    for model_name in GEMINI_MODEL_PREFERENCE:
+        if model_name in available:
+            return model_name
+    return preferred
+
+# Models for templated summary work: the fast tiers by default, with the larger
+# tier of the same provider opt-in or used automatically for long prompts
+DEFAULT_SUMMARY_MODEL = "gpt-4o-mini"
+HIGH_QUALITY_MODEL = "gpt-4"
+GEMINI_SUMMARY_MODEL = "gemini-1.5-flash"
+GEMINI_HIGH_QUALITY_MODEL = "gemini-1.5-pro"
+_ESCALATION_MODELS = {
+    DEFAULT_SUMMARY_MODEL: HIGH_QUALITY_MODEL,
+    GEMINI_SUMMARY_MODEL: GEMINI_HIGH_QUALITY_MODEL
+}
+
+# Provider of every supported model name; other names are rejected before any request
+MODEL_PROVIDERS = MappingProxyType({
+    "gpt-4": "openai",
+    "gpt-4o": "openai",
+    "gpt-4o-mini": "openai",
+    "gpt-3.5-turbo": "openai",
+    "gemini-pro": "gemini",
+    "gemini-1.5-pro": "gemini",
+    "gemini-1.5-flash": "gemini"
+})
+_PROVIDER_NAMES = {"openai": "OpenAI", "gemini": "Gemini"}
+
+# Estimated prompt size (about 4 characters per token) above which the fast
+# models escalate to their larger tier
+AUTO_ROUTE_TOKEN_LIMIT = 2000
+CHARS_PER_TOKEN = 4
+
+def _route_model(model_name: str, prompt: str) -> str:
+    """Escalate a fast summary model to its larger tier for long prompts."""
+    if len(prompt) > AUTO_ROUTE_TOKEN_LIMIT * CHARS_PER_TOKEN:
+        return _ESCALATION_MODELS.get(model_name, model_name)
+    return model_name
+
+# OpenAI HTTP settings: bounded timeout and retries, and a keep-alive
+# connection pool shared by every request made through one client
+OPENAI_TIMEOUT = 60.0
+OPENAI_MAX_RETRIES = 2
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# HTTP/2 multiplexes concurrent requests over those connections; httpx needs
+# the optional h2 package for it, so it is only enabled when h2 is installed
+OPENAI_HTTP2 = importlib.util.find_spec("h2") is not None
+
+def openai_http_client() -> httpx.Client:
+    """Build a pooled HTTP client for an OpenAI client, to be reused for every request."""
+    return httpx.Client(http2=OPENAI_HTTP2, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_TIMEOUT)
+
+def async_openai_http_client() -> httpx.AsyncClient:
+    """Async counterpart of openai_http_client."""
+    return httpx.AsyncClient(http2=OPENAI_HTTP2, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_TIMEOUT)
+
+# Opening shared by every RAG prompt. The three methods emit the same bytes up
+# to and including PROMPT_DIVIDER for a given message and query, so provider
+# prefix caches can reuse that prefix across the prompts of a hybrid run.
+RAG_SYSTEM_PROMPT = (
+    "You are an ISO 20022 financial messaging analyst. "
+    "Explain messages in clear, business-friendly language."
+)
+PROMPT_DIVIDER = "\n---\n"
+
+# Key under which prepare_message attaches the prebuilt prompt context.
+# Keys starting with an underscore are not message fields.
+PROMPT_CONTEXT_KEY = "_prompt_context"
+
+def _message_fields(message_data: Dict) -> str:
+    """Render parsed message fields compactly, one "field: value" line each."""
+    lines = []
+    for field, value in message_data.items():
+        if field == 'message_type' or field.startswith('_'):
+            continue
+        if field == 'transactions':
+            value = "; ".join(" ".join(map(str, txn.values())) for txn in value)
+        lines.append(f"{field}: {value}")
+    return "\n".join(lines)
+
+def build_prompt_context(message_data: Dict) -> Dict[str, object]:
+    """Render the query-independent prompt parts of a parsed message.
+    
+    Covers the message fields block, the Context-Enriched RAG context and the
+    Reranker RAG chunks, so each is built once per message rather than once
+    per prompt.
+    """
+    return {
+        "fields": _message_fields(message_data),
+        "context": _message_context(message_data),
+        "chunks": _reranked_chunks(message_data)
+    }
+
+def _prompt_part(message_data: Dict, part: str, build: Callable[[Dict], object]):
+    """Return one part of the prompt context attached by prepare_message, or build it."""
+    context = message_data.get(PROMPT_CONTEXT_KEY)
+    return context[part] if context else build(message_data)
+
+def _prompt_prefix(message_data: Dict, query: Optional[str] = None) -> str:
+    """Build the method-independent prompt prefix for a message.
+    
+    Summaries are built from the fields each method selects, so the full
+    message data is only included when answering a query.
+    """
+    prefix = f"{RAG_SYSTEM_PROMPT}\n\nMessage Type: {message_data.get('message_type', '')}"
+    if query:
+        prefix += f"\nMessage Data:\n{_prompt_part(message_data, 'fields', _message_fields)}"
+    return prefix + PROMPT_DIVIDER
+
+def _chat_messages(prompt: str) -> List[Dict[str, str]]:
+    """Split a prompt into chat messages, sending RAG_SYSTEM_PROMPT as the system turn.
+    
+    Keeping the invariant instructions in their own leading message keeps the
+    first tokens of every request byte-identical for OpenAI's prefix cache.
+    """
+    if prompt.startswith(RAG_SYSTEM_PROMPT):
+        return [
+            {"role": "system", "content": RAG_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt[len(RAG_SYSTEM_PROMPT):].lstrip()}
+        ]
+    return [{"role": "user", "content": prompt}]
+
+# Messages packed into one request by batch_summary
+BATCH_SUMMARY_SIZE = 10
+
+# Maximum LLM requests in flight at once in summary_many
+ASYNC_CONCURRENCY = 48
+
+# Responses kept in the in-process LRU cache in front of the on-disk cache
+MEMORY_CACHE_SIZE = 4096
+
+def _batch_summary_prompt(messages: List[Dict], query: Optional[str] = None) -> str:
+    """Build one prompt asking for an independent answer per message."""
+    task = f"answer: {query}" if query else "write a clear, business-friendly summary"
+    rows = "\n\n".join(
+        f"[{i}] Message Type: {message_data.get('message_type', '')}\n"
+        f"{_prompt_part(message_data, 'fields', _message_fields)}"
+        for i, message_data in enumerate(messages, 1)
+    )
+    return (
+        f"{RAG_SYSTEM_PROMPT}\n\n"
+        f"For each numbered ISO 20022 message below, independently {task}\n"
+        f"Return only a JSON array of exactly {len(messages)} strings, one per message, in order."
+        f"{PROMPT_DIVIDER}"
+        f"{rows}"
+    )
+
+def _parse_json_answers(response: str, count: int) -> Optional[List[str]]:
+    """Extract a JSON array of `count` answers from a response, or return None."""
+    start, end = response.find('['), response.rfind(']')
+    try:
+        answers = json.loads(response[start:end + 1]) if start != -1 else None
+    except ValueError:
+        answers = None
+    
+    if not isinstance(answers, list) or len(answers) != count:
+        return None
+    return [str(answer) for answer in answers]
+
+def _split_batch_response(response: str, count: int) -> List[str]:
+    """Split a batched JSON-array response into one answer per message.
+    
+    Errors, and responses that are not a JSON array of `count` items, yield
+    an "Error: ..." string for every message in the batch.
+    """
+    if response.startswith("Error"):
+        return [response] * count
+    
+    answers = _parse_json_answers(response, count)
+    if answers is None:
+        return [f"Error: could not split batched response into {count} answers"] * count
+    return answers
+
+def _packed_queries(queries: List[str]) -> str:
+    """Combine several questions into one query asking for a JSON array of answers."""
+    numbered = "\n".join(f"{i}. {query}" for i, query in enumerate(queries, 1))
+    return (
+        f"Answer each numbered question below independently.\n{numbered}\n"
+        f"Return only a JSON array of exactly {len(queries)} strings, one answer per question, in order."
+    )
+
 class ISO20022RAG:
-    def __init__(self, openai_key: Optional[str] = None, gemini_key: Optional[str] = None):
-        """Initialize RAG with API keys."""
+    def __init__(
+        self,
+        openai_key: Optional[str] = None,
+        gemini_key: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        use_cache: bool = True,
+        http_clients: Optional[Tuple[httpx.Client, httpx.AsyncClient]] = None
+    ):
+        """Initialize RAG with API keys.
+        
+        Args:
+            openai_key: OpenAI API key
+            gemini_key: Gemini API key
+            cache_path: If set, LLM responses are persisted in a shelve file at
+                this path and reused across runs for identical prompts.
+            use_cache: Reuse responses for identical (model, prompt) pairs;
+                False disables both the in-process and on-disk caches.
+            http_clients: Pooled (sync, async) HTTP clients for the OpenAI
+                clients, shared with other instances; close() leaves them open.
+                By default this instance builds and owns its own pair.
+        """
         self.openai_key = openai_key
         self.gemini_key = gemini_key
         self.openai_client = None
+        self.async_openai_client = None
         self.gemini_model = None
+        self.gemini_flash_model = None
+        
+        # In-process LRU plus optional on-disk response cache, shared by the worker threads
+        self._memory_cache = OrderedDict() if use_cache else None
+        self._response_cache = shelve.open(cache_path) if use_cache and cache_path else None
+        self._response_cache_lock = threading.Lock()
+        # Requests currently being made, by cache key, so concurrent identical calls share one
+        self._in_flight: Dict[str, Future] = {}
         
         # Initialize clients only if keys are provided
+        self._owns_http_clients = http_clients is None
         if openai_key:
-            self.openai_client = OpenAI(api_key=openai_key)
+            http_client, async_http_client = http_clients or (openai_http_client(), async_openai_http_client())
+            self.openai_client = OpenAI(
+                api_key=openai_key,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=http_client
+            )
+            self.async_openai_client = AsyncOpenAI(
+                api_key=openai_key,
+                timeout=OPENAI_TIMEOUT,
+                max_retries=OPENAI_MAX_RETRIES,
+                http_client=async_http_client
+            )
         
         if gemini_key:
             try:
@@ -40,157 +715,185 @@ class ISO20022RAG:
                     "temperature": 0.3,
                     "max_output_tokens": 2048,
                 }
+                # Resolve unavailable models to the best available one up front
+                available = _available_gemini_models(gemini_key)
                 self.gemini_model = genai.GenerativeModel(
-                    model_name="gemini-1.5-pro",
+                    model_name=_pick_gemini_model(GEMINI_HIGH_QUALITY_MODEL, available),
+                    generation_config=generation_config
+                )
+                self.gemini_flash_model = genai.GenerativeModel(
+                    model_name=_pick_gemini_model(GEMINI_SUMMARY_MODEL, available),
                     generation_config=generation_config
                 )
             except Exception as e:
                 print(f"Error initializing Gemini: {str(e)}")
+        
+        # Provider per supported model, limited to the providers configured above
+        configured = {'openai': self.openai_client is not None, 'gemini': self.gemini_model is not None}
+        self._model_routes = {
+            model: provider for model, provider in MODEL_PROVIDERS.items() if configured[provider]
+        }
     
-    def _detect_message_type(self, root: ET.Element) -> str:
-        """Detect the message type from the XML root element."""
-        if root.find('.//ns:FIToFICstmrCdtTrf', XML_NAMESPACES['pacs.008']) is not None:
-            return 'pacs.008'
-        elif root.find('.//ns:FIToFIPmtStsRpt', XML_NAMESPACES['pacs.002']) is not None:
-            return 'pacs.002'
-        elif root.find('.//ns:BkToCstmrStmt', XML_NAMESPACES['camt.053']) is not None:
-            return 'camt.053'
-        elif root.find('.//ns:CstmrCdtTrfInitn', XML_NAMESPACES['pain.001']) is not None:
-            return 'pain.001'
-        else:
+    def _detect_message_type(self, root: ET._Element) -> str:
+        """Detect the message type from the namespace of the XML root element."""
+        tag = root.tag
+        ns_uri = tag[1:tag.index('}')] if tag.startswith('{') else ''
+        msg_type = _NAMESPACE_TO_TYPE.get(ns_uri)
+        if msg_type is None:
             raise ValueError("Unknown message type")
+        return msg_type
     
-    def parse_iso_message(self, xml_content: str) -> Dict:
-        """Parse ISO 20022 XML message into structured data."""
-        # Try each namespace until we find the right one
-        root = None
-        msg_type = None
+    def detect_message_type(self, xml_content: str) -> str:
+        """Detect the message type of raw XML without building the document tree.
         
-        for type_name, ns in XML_NAMESPACES.items():
-            try:
-                root = ET.fromstring(xml_content)
-                if self._detect_message_type(root) == type_name:
-                    msg_type = type_name
-                    break
-            except ET.ParseError:
-                continue
-        
-        if not root or not msg_type:
+        The XML is fed to a pull parser in small chunks and parsing stops at the
+        root start tag, so the cost does not grow with the size of the message.
+        """
+        parser = ET.XMLPullParser(events=('start',), resolve_entities=False, no_network=True)
+        content = xml_content.encode('utf-8')
+        try:
+            for offset in range(0, len(content), _SNIFF_CHUNK_SIZE):
+                parser.feed(content[offset:offset + _SNIFF_CHUNK_SIZE])
+                for _, root in parser.read_events():
+                    return self._detect_message_type(root)
+        except ET.ParseError:
+            pass
+        raise ValueError("Could not parse XML message or determine message type")
+    
+    def parse_iso_messages(self, xml_contents: Sequence[Union[str, bytes]]) -> List[Dict]:
+        """Parse several ISO 20022 XML messages, reusing one parser for all of them."""
+        return [self.parse_iso_message(xml_content) for xml_content in xml_contents]
+    
+    def parse_iso_message(self, xml_content: Union[str, bytes]) -> Dict:
+        """Parse ISO 20022 XML message into structured data.
+        
+        Bytes are parsed as-is, honouring the XML declaration's encoding.
+        """
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode('utf-8')
+        try:
+            root = ET.fromstring(xml_content, _xml_parser())
+        except ET.ParseError:
             raise ValueError("Could not parse XML message or determine message type")
         
-        ns = XML_NAMESPACES[msg_type]
+        msg_type = self._detect_message_type(root)
         
-        # Common fields for all message types
-        data = {
-            'message_type': msg_type,
-            'message_id': root.find('.//ns:MsgId', ns).text,
-            'created_at': root.find('.//ns:CreDtTm', ns).text
-        }
+        # Common and message type specific fields, read in one XPath evaluation
+        data = {'message_type': msg_type}
+        fields, record_xpath = COMPILED_RECORD_XPATHS[msg_type]
+        values = record_xpath(root).split(_FIELD_SEPARATOR)
+        if len(values) == len(fields) and all(values):
+            data.update(zip(fields, values))
+        else:
+            # Missing or empty fields: read them one at a time, so an empty
+            # element gives None and only a missing one raises
+            for field, field_xpath in COMPILED_XPATHS[msg_type].items():
+                data[field] = _required_field(root, field, field_xpath)
         
-        # Message type specific fields
-        if msg_type == 'pacs.008':
-            data.update({
-                'amount': root.find('.//ns:TtlIntrBkSttlmAmt', ns).text,
-                'currency': root.find('.//ns:TtlIntrBkSttlmAmt', ns).get('Ccy'),
-                'debtor_name': root.find('.//ns:Dbtr/ns:Nm', ns).text,
-                'creditor_name': root.find('.//ns:Cdtr/ns:Nm', ns).text,
-                'debtor_bank': root.find('.//ns:DbtrAgt//ns:BICFI', ns).text,
-                'creditor_bank': root.find('.//ns:CdtrAgt//ns:BICFI', ns).text
-            })
-            
-            # Optional fields
-            charge_bearer = root.find('.//ns:ChrgBr', ns)
-            if charge_bearer is not None:
-                data['charge_bearer'] = charge_bearer.text
-            
-            purpose = root.find('.//ns:RmtInf/ns:Ustrd', ns)
-            if purpose is not None:
-                data['purpose'] = purpose.text
-        
-        elif msg_type == 'pacs.002':
-            # Status report fields
-            data.update({
-                'original_message_id': root.find('.//ns:OrgnlMsgId', ns).text,
-                'original_message_type': root.find('.//ns:OrgnlMsgNmId', ns).text,
-                'group_status': root.find('.//ns:GrpSts', ns).text
-            })
-        
-        elif msg_type == 'camt.053':
-            # Statement fields
-            data.update({
-                'statement_id': root.find('.//ns:Stmt/ns:Id', ns).text,
-                'account_id': root.find('.//ns:Stmt/ns:Acct/ns:Id/ns:IBAN', ns).text,
-                'balance_amount': root.find('.//ns:Stmt/ns:Bal/ns:Amt', ns).text,
-                'balance_currency': root.find('.//ns:Stmt/ns:Bal/ns:Amt', ns).get('Ccy')
-            })
-            
+        # Optional fields
+        for field, (xpath, attribute) in COMPILED_OPTIONAL_XPATHS.get(msg_type, {}).items():
+            elements = xpath(root)
+            if elements:
+                data[field] = _field_value(elements[0], attribute)
+        
+        if msg_type == 'camt.053':
             # Get transactions
-            entries = root.findall('.//ns:Stmt/ns:Ntry', ns)
-            data['transactions'] = []
-            for entry in entries:
-                txn = {
-                    'amount': entry.find('.//ns:Amt', ns).text,
-                    'currency': entry.find('.//ns:Amt', ns).get('Ccy'),
-                    'credit_debit': entry.find('.//ns:CdtDbtInd', ns).text,
-                    'status': entry.find('.//ns:Sts', ns).text,
-                    'booking_date': entry.find('.//ns:BookgDt/ns:DtTm', ns).text
-                }
-                data['transactions'].append(txn)
-        
-        elif msg_type == 'pain.001':
-            # Payment initiation fields
-            data.update({
-                'initiator_name': root.find('.//ns:InitgPty/ns:Nm', ns).text,
-                'payment_method': root.find('.//ns:PmtInf/ns:PmtMtd', ns).text,
-                'execution_date': root.find('.//ns:PmtInf/ns:ReqdExctnDt', ns).text,
-                'debtor_name': root.find('.//ns:Dbtr/ns:Nm', ns).text,
-                'debtor_account': root.find('.//ns:DbtrAcct/ns:Id/ns:IBAN', ns).text,
-                'amount': root.find('.//ns:InstdAmt', ns).text,
-                'currency': root.find('.//ns:InstdAmt', ns).get('Ccy'),
-                'creditor_name': root.find('.//ns:Cdtr/ns:Nm', ns).text,
-                'creditor_account': root.find('.//ns:CdtrAcct/ns:Id/ns:IBAN', ns).text
-            })
+            data['transactions'] = self._parse_statement_entries(root)
         
         return data
     
+    def prepare_message(self, message_data: Dict) -> Dict:
+        """Attach the prebuilt prompt context to parsed message data.
+        
+        Use this when the same message is summarized or queried many times;
+        every RAG method then reuses the context instead of re-rendering it.
+        
+        Returns:
+            The same dict, for chaining after parse_iso_message
+        """
+        message_data[PROMPT_CONTEXT_KEY] = build_prompt_context(message_data)
+        return message_data
+    
+    def prompt_fingerprint(self, message_data: Dict) -> str:
+        """Hash the prompts every RAG method builds for a message.
+        
+        Covers each method's summary prompt and its packed-question prompt, so
+        the hash changes with the message and with any prompt template. Answers
+        stored under it are only reused while the prompts are unchanged.
+        """
+        probe = _packed_queries(["{query}", "{query}"])
+        prompts = [
+            self._prompt_builder(method)(message_data, query)
+            for method in ('simple', 'context', 'reranker')
+            for query in (None, probe)
+        ]
+        return hashlib.sha256("\0".join(prompts).encode("utf-8")).hexdigest()
+    
+    def _parse_statement_entries(self, root: ET._Element) -> List[Dict]:
+        """Extract the camt.053 statement entries with one XPath call per field."""
+        entries = _STATEMENT_ENTRIES_XPATH(root)
+        columns = {field: xpath(root) for field, xpath in COMPILED_STATEMENT_ENTRY_XPATHS.items()}
+        
+        if all(len(values) == len(entries) for values in columns.values()):
+            fields = list(columns)
+            return [dict(zip(fields, row)) for row in zip(*columns.values())]
+        
+        # Entries with missing, empty or unusual fields: walk them one at a time
+        return [
+            {
+                field: _required_field(entry, field, field_xpath)
+                for field, field_xpath in COMPILED_ENTRY_XPATHS.items()
+            }
+            for entry in entries
+        ]
+    
+    def summary(
+        self,
+        message_data: Dict,
+        method: str = "simple",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: str = None
+    ) -> str:
+        """Summarize a parsed message, or answer a query about it, with one RAG method.
+        
+        Args:
+            message_data: Parsed message data, as returned by parse_iso_message
+            method: 'simple', 'context' or 'reranker'
+            model_name: Model to call
+            query: Optional question about the message
+            
+        Returns:
+            The model response, or an "Error ..." string
+        """
+        answer = self._shortcut_answer(method, message_data, query)
+        if answer is not None:
+            return answer
+        return self._call_llm(self._prompt_builder(method)(message_data, query), model_name)
+    
+    def _shortcut_answer(self, method: str, message_data: Dict, query: Optional[str]) -> Optional[str]:
+        """Answer a query without the LLM when possible, or return None.
+        
+        Simple RAG answers simple factual questions (amount, sender, status, ...)
+        directly from the message data.
+        """
+        if method == 'simple' and query:
+            return _template_answer(message_data, query)
+        return None
+    
     def simple_rag_summary(
         self,
         message_data: Dict,
-        model_name: str = "gpt-4",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
         query: str = None
     ) -> str:
         """Simple RAG: Basic retrieval and generation."""
-        # Knowledge base
-        iso_knowledge_base = [
-            {
-                "field": "pacs.008",
-                "description": "Customer credit transfer message",
-                "key_fields": ["MsgId", "CreDtTm", "TtlIntrBkSttlmAmt", "Dbtr", "Cdtr"],
-                "summary_template": "Payment of {amount} {currency} was made on {created_at} from {debtor_name} to {creditor_name}."
-            },
-            {
-                "field": "pacs.002",
-                "description": "Payment status report message",
-                "key_fields": ["MsgId", "CreDtTm", "OrgnlMsgId", "GrpSts"],
-                "summary_template": "Status report for message {original_message_id}: {group_status} at {created_at}."
-            },
-            {
-                "field": "camt.053",
-                "description": "Bank statement message",
-                "key_fields": ["MsgId", "CreDtTm", "StmtId", "Bal"],
-                "summary_template": "Statement {statement_id} with balance {balance_amount} {balance_currency} at {created_at}."
-            },
-            {
-                "field": "pain.001",
-                "description": "Payment initiation message",
-                "key_fields": ["MsgId", "CreDtTm", "InitgPty", "Dbtr", "Cdtr"],
-                "summary_template": "Payment initiation from {debtor_name} to {creditor_name} for {amount} {currency} on {created_at}."
-            }
-        ]
-        
+        return self.summary(message_data, 'simple', model_name, query)
+    
+    def simple_rag_prompt(self, message_data: Dict, query: str = None) -> str:
+        """Build the Simple RAG prompt without calling the LLM."""
         # Find relevant template
         msg_type = message_data.get('message_type', '')
-        template = next((t for t in iso_knowledge_base if t["field"] == msg_type), None)
+        template = _KB_BY_TYPE.get(msg_type)
         
         if not template:
             raise ValueError(f"Unknown message type: {msg_type}")
@@ -198,306 +901,558 @@ class ISO20022RAG:
         # Generate summary using template
         if query:
             prompt = f"""
-            Analyze this ISO 20022 financial message to answer: {query}
-            
-            Message Type: {template['description']}
+            Description: {template['description']}
             Key Fields: {template['key_fields']}
-            Message Data: {message_data}
             
             Provide a clear, business-friendly response focusing on the specific query.
+            
+            Question: {query}
             """
         else:
             summary = template["summary_template"].format(**message_data)
             prompt = f"""
             Generate a summary for this ISO 20022 financial message:
             
-            Message Type: {template['description']}
+            Description: {template['description']}
             Summary: {summary}
-            Message Data: {message_data}
             
             Provide a clear, business-friendly summary.
             """
         
-        return self._call_llm(prompt, model_name)
+        return _prompt_prefix(message_data, query) + prompt
     
     def context_enriched_rag_summary(
         self,
         message_data: Dict,
-        model_name: str = "gpt-4",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
         query: str = None
     ) -> str:
         """Context-Enriched RAG: Enhanced retrieval with document-level context."""
-        
+        return self.summary(message_data, 'context', model_name, query)
+    
+    def context_enriched_rag_prompt(self, message_data: Dict, query: str = None) -> str:
+        """Build the Context-Enriched RAG prompt without calling the LLM."""
         # Get message type specific context
-        msg_type = message_data['message_type']
-        msg_contexts = {
-            'pacs.008': {
-                "description": "Customer credit transfer",
-                "key_points": [
-                    f"Transfer amount: {message_data.get('amount', 'N/A')} {message_data.get('currency', 'N/A')}",
-                    f"From: {message_data.get('debtor_name', 'N/A')} (Bank: {message_data.get('debtor_bank', 'N/A')})",
-                    f"To: {message_data.get('creditor_name', 'N/A')} (Bank: {message_data.get('creditor_bank', 'N/A')})",
-                    f"Date: {message_data.get('created_at', 'N/A')}"
-                ],
-                "compliance": [
-                    "Verify sender and receiver details",
-                    "Check for valid bank identifiers",
-                    "Ensure positive amount in valid currency"
-                ]
-            },
-            'pacs.002': {
-                "description": "Payment status report",
-                "key_points": [
-                    f"Status: {message_data.get('group_status', 'N/A')}",
-                    f"Original message: {message_data.get('original_message_id', 'N/A')}",
-                    f"Message type: {message_data.get('original_message_type', 'N/A')}",
-                    f"Date: {message_data.get('created_at', 'N/A')}"
-                ],
-                "compliance": [
-                    "Valid status code",
-                    "Reference to original message",
-                    "Proper status reason if rejected"
-                ]
-            },
-            'camt.053': {
-                "description": "Bank statement",
-                "key_points": [
-                    f"Statement ID: {message_data.get('statement_id', 'N/A')}",
-                    f"Account: {message_data.get('account_id', 'N/A')}",
-                    f"Balance: {message_data.get('balance_amount', 'N/A')} {message_data.get('balance_currency', 'N/A')}",
-                    f"Date: {message_data.get('created_at', 'N/A')}"
-                ],
-                "compliance": [
-                    "Valid account identifier",
-                    "Balance calculation accuracy",
-                    "Transaction details completeness"
-                ]
-            },
-            'pain.001': {
-                "description": "Payment initiation",
-                "key_points": [
-                    f"Amount: {message_data.get('amount', 'N/A')} {message_data.get('currency', 'N/A')}",
-                    f"Initiator: {message_data.get('initiator_name', 'N/A')}",
-                    f"From: {message_data.get('debtor_name', 'N/A')} ({message_data.get('debtor_account', 'N/A')})",
-                    f"To: {message_data.get('creditor_name', 'N/A')} ({message_data.get('creditor_account', 'N/A')})",
-                    f"Date: {message_data.get('created_at', 'N/A')}"
-                ],
-                "compliance": [
-                    "Valid account numbers",
-                    "Authorized initiator",
-                    "Sufficient funds check"
-                ]
-            }
-        }
-        
-        context = msg_contexts.get(msg_type, {
-            "description": "Unknown message type",
-            "key_points": [f"Message ID: {message_data['message_id']}", f"Date: {message_data['created_at']}"],
-            "compliance": ["Standard message validation"]
-        })
+        context = _prompt_part(message_data, "context", _message_context)
         
         # Generate prompt based on query or default to summary
         if query:
             prompt = f"""
-            Question about this {context['description']} message: {query}
-
             Key Information:
-            {chr(10).join(f"• {point}" for point in context['key_points'])}
+            {context['key_points']}
 
             Compliance Checks:
-            {chr(10).join(f"• {check}" for check in context['compliance'])}
+            {context['compliance']}
 
             Please provide a clear, concise response focusing on the question.
             Keep the language business-friendly and avoid technical jargon.
             Limit the response to 2-3 sentences unless more detail is specifically requested.
+
+            Question about this {context['description']} message: {query}
             """
         else:
             prompt = f"""
             Summarize this {context['description']} message:
 
             Key Information:
-            {chr(10).join(f"• {point}" for point in context['key_points'])}
+            {context['key_points']}
 
             Please provide a clear, concise summary in 2-3 sentences.
             Focus on the key business information and impact.
             Use business-friendly language and avoid technical details unless crucial.
             """
         
-        return self._call_llm(prompt, model_name)
+        return _prompt_prefix(message_data, query) + prompt
     
     def reranker_rag_summary(
         self,
         message_data: Dict,
-        model_name: str = "gpt-4",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
         query: str = None
     ) -> str:
         """Reranker RAG: Uses reranking to prioritize most relevant context chunks."""
-        # Generate context chunks based on message type
-        context_chunks = []
-        
-        # Common chunks for all message types
-        context_chunks.extend([
-            {
-                "content": f"Message ID: {message_data['message_id']}",
-                "relevance": 0.5,
-                "type": "metadata"
-            },
-            {
-                "content": f"Created at: {message_data['created_at']}",
-                "relevance": 0.6,
-                "type": "metadata"
-            }
-        ])
-        
-        # Message type specific chunks
-        if message_data['message_type'] == 'pacs.008':
-            context_chunks.extend([
-                {
-                    "content": f"Payment transaction: {message_data['amount']} {message_data['currency']}",
-                    "relevance": 0.9,
-                    "type": "transaction_details"
-                },
-                {
-                    "content": f"Parties involved: {message_data['debtor_name']} → {message_data['creditor_name']}",
-                    "relevance": 0.8,
-                    "type": "party_information"
-                },
-                {
-                    "content": f"Banks: {message_data['debtor_bank']} → {message_data['creditor_bank']}",
-                    "relevance": 0.7,
-                    "type": "banking_details"
-                }
-            ])
-        elif message_data['message_type'] == 'pacs.002':
-            context_chunks.extend([
-                {
-                    "content": f"Status: {message_data['group_status']}",
-                    "relevance": 0.9,
-                    "type": "status"
-                },
-                {
-                    "content": f"Original message: {message_data['original_message_id']} ({message_data['original_message_type']})",
-                    "relevance": 0.8,
-                    "type": "reference"
-                }
-            ])
-        elif message_data['message_type'] == 'camt.053':
-            context_chunks.extend([
-                {
-                    "content": f"Statement ID: {message_data['statement_id']}",
-                    "relevance": 0.7,
-                    "type": "metadata"
-                },
-                {
-                    "content": f"Account: {message_data['account_id']}",
-                    "relevance": 0.8,
-                    "type": "account"
-                },
-                {
-                    "content": f"Balance: {message_data['balance_amount']} {message_data['balance_currency']}",
-                    "relevance": 0.9,
-                    "type": "balance"
-                }
-            ])
-            # Add transactions if available
-            if 'transactions' in message_data:
-                for i, txn in enumerate(message_data['transactions']):
-                    context_chunks.append({
-                        "content": f"Transaction {i+1}: {txn['amount']} {txn['currency']} ({txn['credit_debit']})",
-                        "relevance": 0.6 - (i * 0.1),  # Decrease relevance for each transaction
-                        "type": "transaction"
-                    })
-        elif message_data['message_type'] == 'pain.001':
-            context_chunks.extend([
-                {
-                    "content": f"Payment initiation: {message_data['amount']} {message_data['currency']}",
-                    "relevance": 0.9,
-                    "type": "transaction_details"
-                },
-                {
-                    "content": f"Initiator: {message_data['initiator_name']}",
-                    "relevance": 0.7,
-                    "type": "party_information"
-                },
-                {
-                    "content": f"From: {message_data['debtor_name']} ({message_data['debtor_account']})",
-                    "relevance": 0.8,
-                    "type": "debtor_details"
-                },
-                {
-                    "content": f"To: {message_data['creditor_name']} ({message_data['creditor_account']})",
-                    "relevance": 0.8,
-                    "type": "creditor_details"
-                }
-            ])
-        
-        # Rerank by relevance
-        reranked_chunks = sorted(context_chunks, key=lambda x: x['relevance'], reverse=True)
-        
-        # Use top 3 most relevant chunks
-        top_chunks = reranked_chunks[:3]
+        return self.summary(message_data, 'reranker', model_name, query)
+    
+    def reranker_rag_prompt(self, message_data: Dict, query: str = None) -> str:
+        """Build the Reranker RAG prompt without calling the LLM."""
+        # Most relevant context chunks for the message type
+        top_chunks = _prompt_part(message_data, "chunks", _reranked_chunks)
         
         if query:
             prompt = f"""
-            Analyze this ISO 20022 financial message to answer: {query}
-            
             Most relevant information:
-            Primary: {top_chunks[0]['content']}
-            Secondary: {top_chunks[1]['content']}
-            Additional: {top_chunks[2]['content']}
-            
-            Message Type: {message_data['message_type']}
+            Primary: {top_chunks[0]}
+            Secondary: {top_chunks[1]}
+            Additional: {top_chunks[2]}
             
             Provide a clear, business-friendly response focusing on the specific query.
+            
+            Question: {query}
             """
         else:
             prompt = f"""
             Generate a summary using the most relevant information:
             
-            Primary: {top_chunks[0]['content']}
-            Secondary: {top_chunks[1]['content']}
-            Additional: {top_chunks[2]['content']}
-            
-            Message Type: {message_data['message_type']}
+            Primary: {top_chunks[0]}
+            Secondary: {top_chunks[1]}
+            Additional: {top_chunks[2]}
             
             Create a concise business summary focusing on the key details.
             Keep the response clear and direct.
             """
         
-        return self._call_llm(prompt, model_name)
+        return _prompt_prefix(message_data, query) + prompt
+    
+    def batch_summary(
+        self,
+        messages: List[Dict],
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: str = None,
+        batch_size: int = BATCH_SUMMARY_SIZE,
+        use_batch_api: bool = False
+    ) -> List[str]:
+        """Summarize many parsed messages, packing several into each LLM call.
+        
+        The batch prompt is a Simple RAG prompt, so a simple factual query is
+        answered from each message's data where possible. Each group of
+        `batch_size` remaining messages is sent as one prompt that asks for a
+        JSON array of answers, and the groups are dispatched together through
+        _batch_complete. Results are returned in message order.
+        
+        With use_batch_api, a Gemini model's prompts are submitted as one
+        Gemini Batch API job instead: about half the cost, but slower to return.
+        """
+        results = [self._shortcut_answer('simple', message_data, query) for message_data in messages]
+        pending = [i for i, answer in enumerate(results) if answer is None]
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        responses = self._batch_complete(
+            [_batch_summary_prompt([messages[j] for j in batch], query) for batch in batches],
+            model_name,
+            use_batch_api
+        )
+        
+        for batch, response in zip(batches, responses):
+            for j, answer in zip(batch, _split_batch_response(response, len(batch))):
+                results[j] = answer
+        return results
     
-    def _validate_api_keys(self, model_name: str) -> bool:
-        """Validate that required API keys are available."""
-        if model_name.startswith('gpt') and not self.openai_client:
-            raise ValueError("OpenAI API key not configured")
-        elif not model_name.startswith('gpt') and not self.gemini_model:
-            raise ValueError("Gemini API key not configured")
-        return True
+    def multi_query_summary(
+        self,
+        message_data: Dict,
+        queries: List[str],
+        method: str = "simple",
+        model_name: str = DEFAULT_SUMMARY_MODEL
+    ) -> List[str]:
+        """Answer several queries about one message with a single LLM call.
+        
+        The method's context for the message is sent once with all the
+        questions, and the JSON array of answers is split client-side. If the
+        response cannot be split, the questions are asked one at a time.
+        
+        Returns:
+            One answer per query, in order
+        """
+        answers = [self._shortcut_answer(method, message_data, query) for query in queries]
+        pending = [i for i, answer in enumerate(answers) if answer is None]
+        if len(pending) == 1:
+            answers[pending[0]] = self.summary(message_data, method, model_name, queries[pending[0]])
+        elif pending:
+            pending_queries = [queries[i] for i in pending]
+            prompt = self._prompt_builder(method)(message_data, _packed_queries(pending_queries))
+            response = self._call_llm(prompt, model_name)
+            
+            if response.startswith("Error"):
+                packed = [response] * len(pending)
+            else:
+                packed = _parse_json_answers(response, len(pending)) or [
+                    self.summary(message_data, method, model_name, query) for query in pending_queries
+                ]
+            for i, answer in zip(pending, packed):
+                answers[i] = answer
+        return answers
+    
+    def _provider_for(self, model_name: str) -> str:
+        """Return the provider serving a model, rejecting unknown models and missing API keys."""
+        provider = self._model_routes.get(model_name)
+        if provider is None:
+            provider = MODEL_PROVIDERS.get(model_name)
+            if provider is None:
+                raise ValueError(f"Unknown model '{model_name}'. Supported models: {', '.join(MODEL_PROVIDERS)}")
+            raise ValueError(f"{_PROVIDER_NAMES[provider]} API key not configured")
+        return provider
+
+    def _batch_complete(
+        self,
+        prompts: List[str],
+        model_name: str,
+        use_batch_api: bool = False
+    ) -> List[str]:
+        """Complete several prompts against one model in a single dispatch.
+        
+        The requests are sent concurrently, or for a Gemini model with
+        use_batch_api as one Batch API job, and results come back in prompt
+        order; a failed prompt yields the same "Error calling ..." string as
+        _call_llm.
+        """
+        if not prompts:
+            return []
+        if use_batch_api and self._model_routes.get(model_name) == 'gemini':
+            return self._gemini_batch_complete(prompts, model_name)
+        with ThreadPoolExecutor(max_workers=len(prompts)) as executor:
+            return list(executor.map(lambda prompt: self._call_llm(prompt, model_name), prompts))
+
+    def _gemini_batch_complete(self, prompts: List[str], model_name: str) -> List[str]:
+        """Complete prompts against a Gemini model as one Batch API job.
+        
+        Cached responses are reused and only the remaining prompts are
+        submitted; a failed job yields an "Error calling ..." string for each.
+        """
+        from .genai_client import batch_generate
+        
+        keys = [self._cache_key(prompt, model_name) for prompt in prompts]
+        responses = [self._cached_response(key) for key in keys]
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if pending:
+            try:
+                completed = [
+                    response or "Error: Empty response from Gemini"
+                    for response in batch_generate(
+                        [prompts[i] for i in pending],
+                        self._gemini_for(model_name).model_name,
+                        self.gemini_key
+                    )
+                ]
+            except Exception as e:
+                completed = [f"Error calling {model_name}: {str(e)}"] * len(pending)
+            for i, response in zip(pending, completed):
+                self._store_response(keys[i], response)
+                responses[i] = response
+        return responses
 
     def _call_llm(self, prompt: str, model_name: str) -> str:
-        """Call the appropriate LLM based on model name."""
+        """Call the appropriate LLM, serving repeated prompts from the response cache.
+        
+        The prompt already encodes the RAG method, query and message data, so
+        (model, prompt) identifies a response. Error responses are not cached.
+        A call made while an identical one is in flight waits for its result
+        instead of sending a second request.
+        """
+        key = self._cache_key(prompt, model_name)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        if key is None:
+            return self._complete(prompt, model_name)
+        
+        future, owner = self._join_in_flight(key)
+        if not owner:
+            return future.result()
+        
+        try:
+            response = self._complete(prompt, model_name)
+        except BaseException as e:
+            self._resolve_in_flight(key, future, error=e)
+            raise
+        self._resolve_in_flight(key, future, response)
+        return response
+
+    async def _call_llm_async(self, prompt: str, model_name: str) -> str:
+        """Async counterpart of _call_llm, sharing its response cache and in-flight calls."""
+        key = self._cache_key(prompt, model_name)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+        if key is None:
+            return await self._complete_async(prompt, model_name)
+        
+        future, owner = self._join_in_flight(key)
+        if not owner:
+            # Shielded so a cancelled waiter does not cancel the shared call
+            return await asyncio.shield(asyncio.wrap_future(future))
+        
         try:
-            self._validate_api_keys(model_name)
+            response = await self._complete_async(prompt, model_name)
+        except BaseException as e:
+            self._resolve_in_flight(key, future, error=e)
+            raise
+        self._resolve_in_flight(key, future, response)
+        return response
+
+    def _join_in_flight(self, key: str) -> Tuple[Future, bool]:
+        """Return the Future of the call in flight for a cache key, registering one if there is none.
+        
+        Returns:
+            (future, owner): owner is True when the caller registered the
+            future, and must make the call and pass its outcome to
+            _resolve_in_flight
+        """
+        with self._response_cache_lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            self._in_flight[key] = future = Future()
+            return future, True
+
+    def _resolve_in_flight(
+        self,
+        key: str,
+        future: Future,
+        response: Optional[str] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """Cache an owned call's response, hand its outcome to every waiter and unregister it."""
+        if error is None:
+            self._store_response(key, response)
+            future.set_result(response)
+        else:
+            future.set_exception(error)
+        with self._response_cache_lock:
+            del self._in_flight[key]
+
+    async def summary_async(
+        self,
+        message_data: Dict,
+        method: str = "simple",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: str = None
+    ) -> str:
+        """Async counterpart of summary."""
+        answer = self._shortcut_answer(method, message_data, query)
+        if answer is not None:
+            return answer
+        return await self._call_llm_async(self._prompt_builder(method)(message_data, query), model_name)
+
+    async def summary_many(
+        self,
+        messages: List[Dict],
+        method: str = "simple",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: str = None,
+        concurrency: int = ASYNC_CONCURRENCY
+    ) -> List[str]:
+        """Summarize many parsed messages concurrently with one RAG method.
+        
+        Args:
+            messages: Parsed message data, as returned by parse_iso_message
+            method: 'simple', 'context' or 'reranker'
+            model_name: Model to call
+            query: Optional question asked of every message
+            concurrency: Maximum requests in flight at once
             
-            if model_name.startswith('gpt'):
+        Returns:
+            One response per message, in order; failures become "Error: ..." strings
+        """
+        # Reject an unknown method before any request is sent
+        self._prompt_builder(method)
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def summarize(message_data: Dict) -> str:
+            async with semaphore:
+                return await self.summary_async(message_data, method, model_name, query)
+        
+        results = await asyncio.gather(
+            *(summarize(message_data) for message_data in messages),
+            return_exceptions=True
+        )
+        return [
+            f"Error: {str(result)}" if isinstance(result, Exception) else result
+            for result in results
+        ]
+
+    def summary_stream(
+        self,
+        message_data: Dict,
+        method: str = "simple",
+        model_name: str = DEFAULT_SUMMARY_MODEL,
+        query: str = None
+    ) -> Iterator[str]:
+        """Stream a RAG response for one parsed message as text chunks arrive.
+        
+        Args:
+            message_data: Parsed message data, as returned by parse_iso_message
+            method: 'simple', 'context' or 'reranker'
+            model_name: Model to call
+            query: Optional question about the message
+            
+        Yields:
+            Response text chunks; joined they equal the non-streaming response
+        """
+        answer = self._shortcut_answer(method, message_data, query)
+        if answer is not None:
+            yield answer
+            return
+        
+        yield from self._call_llm_stream(self._prompt_builder(method)(message_data, query), model_name)
+
+    def _prompt_builder(self, method: str) -> Callable[[Dict, Optional[str]], str]:
+        """Return the prompt builder for a RAG method name."""
+        builders = {
+            'simple': self.simple_rag_prompt,
+            'context': self.context_enriched_rag_prompt,
+            'reranker': self.reranker_rag_prompt
+        }
+        if method not in builders:
+            raise ValueError(f"Unknown RAG method '{method}'. Expected one of: {', '.join(builders)}")
+        return builders[method]
+
+    def _call_llm_stream(self, prompt: str, model_name: str) -> Iterator[str]:
+        """Streaming counterpart of _call_llm, sharing its response cache.
+        
+        A cached response is yielded whole; otherwise chunks are yielded as the
+        provider produces them and the complete response is cached at the end.
+        A failure, even mid-stream, ends with an "Error calling ..." chunk and
+        nothing is cached.
+        """
+        key = self._cache_key(prompt, model_name)
+        cached = self._cached_response(key)
+        if cached is not None:
+            yield cached
+            return
+        
+        chunks = []
+        try:
+            for chunk in self._complete_stream(prompt, model_name):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            yield f"Error calling {model_name}: {str(e)}"
+            return
+        self._store_response(key, "".join(chunks))
+
+    def _cache_key(self, prompt: str, model_name: str) -> Optional[str]:
+        """Response cache key for a prompt, or None when caching is off."""
+        if self._memory_cache is None:
+            return None
+        return hashlib.blake2b(f"{model_name}|{prompt}".encode("utf-8")).hexdigest()
+
+    def _cached_response(self, key: Optional[str]) -> Optional[str]:
+        """Look up a cached response, in memory first and then on disk."""
+        if key is None:
+            return None
+        with self._response_cache_lock:
+            response = self._memory_cache.get(key)
+            if response is not None:
+                self._memory_cache.move_to_end(key)
+                return response
+            if self._response_cache is not None:
+                response = self._response_cache.get(key)
+                if response is not None:
+                    self._remember(key, response)
+            return response
+
+    def _store_response(self, key: Optional[str], response: str) -> None:
+        """Cache a successful response."""
+        if key is None or not response or response.startswith("Error"):
+            return
+        with self._response_cache_lock:
+            self._remember(key, response)
+            if self._response_cache is not None:
+                self._response_cache[key] = response
+
+    def _remember(self, key: str, response: str) -> None:
+        """Add a response to the in-process LRU cache, evicting the oldest entry when full."""
+        self._memory_cache[key] = response
+        self._memory_cache.move_to_end(key)
+        if len(self._memory_cache) > MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+
+    def close(self) -> None:
+        """Close the OpenAI connection pools and flush and close the response cache.
+        
+        A connection pool passed in as http_clients belongs to the caller and stays open.
+        Called on a running event loop, the async pool's close is scheduled on
+        that loop; await aclose() there instead to wait for it.
+        """
+        if self.async_openai_client is not None and self._owns_http_clients:
+            closing = self.async_openai_client.close()
+            try:
+                asyncio.get_running_loop().create_task(closing)
+            except RuntimeError:
+                try:
+                    asyncio.run(closing)
+                except RuntimeError:
+                    # Connections opened on an event loop that has since closed
+                    # cannot be closed from another one; the pool is closed regardless
+                    pass
+        self._close_sync()
+
+    async def aclose(self) -> None:
+        """Async counterpart of close, awaiting the async pool's close on the running loop."""
+        if self.async_openai_client is not None and self._owns_http_clients:
+            await self.async_openai_client.close()
+        self._close_sync()
+
+    def _close_sync(self) -> None:
+        """Close the sync OpenAI connection pool and the response cache."""
+        if self.openai_client is not None and self._owns_http_clients:
+            self.openai_client.close()
+        
+        if self._response_cache is not None:
+            with self._response_cache_lock:
+                self._response_cache.close()
+                self._response_cache = None
+
+    def _gemini_for(self, model_name: str) -> "genai.GenerativeModel":
+        """Return the Gemini model object serving a model name."""
+        if model_name == GEMINI_SUMMARY_MODEL and self.gemini_flash_model is not None:
+            return self.gemini_flash_model
+        return self.gemini_model
+
+    def _complete(self, prompt: str, model_name: str) -> str:
+        """Call the appropriate LLM based on model name."""
+        model_name = _route_model(model_name, prompt)
+        try:
+            if self._provider_for(model_name) == 'openai':
                 response = self.openai_client.chat.completions.create(
                     model=model_name,
-                    messages=[{"role": "user", "content": prompt}],
+                    messages=_chat_messages(prompt),
                     temperature=0.3
                 )
                 return response.choices[0].message.content
             else:
-                try:
-                    response = self.gemini_model.generate_content(prompt)
-                    if not response.text:
-                        return "Error: Empty response from Gemini"
-                    return response.text
-                except Exception as e:
-                    if "not found" in str(e):
-                        # Try fallback to default model if specified model not found
-                        self.gemini_model = genai.GenerativeModel("gemini-1.5-pro")
-                        response = self.gemini_model.generate_content(prompt)
-                        return response.text
-                    raise
+                response = self._gemini_for(model_name).generate_content(prompt)
+                if not response.text:
+                    return "Error: Empty response from Gemini"
+                return response.text
         except Exception as e:
-            return f"Error calling {model_name}: {str(e)}" 
\ No newline at end of file
+            return f"Error calling {model_name}: {str(e)}"
+
+    async def _complete_async(self, prompt: str, model_name: str) -> str:
+        """Call the appropriate LLM without blocking the event loop."""
+        model_name = _route_model(model_name, prompt)
+        try:
+            if self._provider_for(model_name) == 'openai':
+                response = await self.async_openai_client.chat.completions.create(
+                    model=model_name,
+                    messages=_chat_messages(prompt),
+                    temperature=0.3
+                )
+                return response.choices[0].message.content
+            else:
+                response = await self._gemini_for(model_name).generate_content_async(prompt)
+                if not response.text:
+                    return "Error: Empty response from Gemini"
+                return response.text
+        except Exception as e:
+            return f"Error calling {model_name}: {str(e)}"
+
+    def _complete_stream(self, prompt: str, model_name: str) -> Iterator[str]:
+        """Call the appropriate LLM with streaming, yielding text chunks.
+        
+        Errors propagate to the caller, which may already have consumed chunks.
+        """
+        model_name = _route_model(model_name, prompt)
+        if self._provider_for(model_name) == 'openai':
+            stream = self.openai_client.chat.completions.create(
+                model=model_name,
+                messages=_chat_messages(prompt),
+                temperature=0.3,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        else:
+            for chunk in self._gemini_for(model_name).generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
@@ -0,0 +1,130 @@
+"""Semantic response cache for RAG queries.
+
+Responses are grouped by an exact key (model, RAG method, message hash) and
+looked up by query similarity within the group, so a near-duplicate query
+about the same message reuses an earlier answer instead of calling the LLM.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+import zlib
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+# Cosine similarity at or above which two queries count as the same question
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+
+# Dimensions of the default hashed query embedding
+EMBEDDING_DIM = 1024
+
+# Name stored with persisted entries so vectors from another embedder are ignored
+_DEFAULT_EMBEDDER = f"hashed-ngrams-{EMBEDDING_DIM}"
+
+_WORD_RE = re.compile(r"\w+")
+
+def hashed_embedding(text: str) -> np.ndarray:
+    """Embed text as hashed word unigrams and bigrams.
+
+    crc32 is used rather than hash() so vectors are stable across processes
+    and can be persisted.
+    """
+    words = _WORD_RE.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector = np.zeros(EMBEDDING_DIM)
+    for feature in features:
+        vector[zlib.crc32(feature.encode("utf-8")) % EMBEDDING_DIM] += 1.0
+    return vector
+
+def message_hash(message_data: Dict) -> str:
+    """Hash parsed message data canonically, independent of key order.
+
+    Underscore-prefixed keys, such as an attached prompt context, are not
+    message fields and are left out.
+    """
+    fields = {key: value for key, value in message_data.items() if not key.startswith("_")}
+    canonical = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class SemanticCache:
+    """Thread-safe semantic cache of LLM responses, optionally persisted with pickle."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        embed: Optional[Callable[[str], np.ndarray]] = None,
+        embedder_name: Optional[str] = None
+    ):
+        """Initialize the cache.
+
+        Args:
+            path: If set, entries are loaded from and saved to this pickle file
+            threshold: Minimum cosine similarity for a cache hit
+            embed: Query embedding function; defaults to hashed_embedding.
+                A sentence-transformer model's encode can be passed here.
+            embedder_name: Identifies `embed` in the persisted file
+        """
+        self.path = path
+        self.threshold = threshold
+        self._embed = embed or hashed_embedding
+        self._embedder_name = embedder_name or (_DEFAULT_EMBEDDER if embed is None else repr(embed))
+        self._entries: Dict[Hashable, Tuple[List[np.ndarray], List[str]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def embed(self, query: str) -> np.ndarray:
+        """Embed a query as an L2-normalized vector."""
+        vector = np.asarray(self._embed(query), dtype=float)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, key: Hashable, vector: np.ndarray) -> Optional[str]:
+        """Return the response of the most similar cached query under key, if similar enough."""
+        with self._lock:
+            vectors, responses = self._entries.get(key, ((), ()))
+            if vectors:
+                similarities = np.stack(vectors) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self.hits += 1
+                    return responses[best]
+            self.misses += 1
+            return None
+
+    def store(self, key: Hashable, vector: np.ndarray, response: str) -> None:
+        """Cache a response for a query vector under key."""
+        with self._lock:
+            vectors, responses = self._entries.setdefault(key, ([], []))
+            vectors.append(vector)
+            responses.append(response)
+
+    def save(self) -> None:
+        """Write the entries to the cache file, if one is configured."""
+        if not self.path:
+            return
+        with self._lock:
+            state = {"embedder": self._embedder_name, "entries": self._entries}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f)
+            os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        """Load persisted entries, ignoring unreadable files and other embedders."""
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            print(f"Warning: Could not load semantic cache {self.path}: {str(e)}")
+            return
+        if state.get("embedder") == self._embedder_name:
+            self._entries = state["entries"]
@@ -9,15 +9,100 @@ project_root = str(Path(__file__).parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from src.rag_implementations import ISO20022RAG
-from src.evaluation import ISO20022Evaluator
-from data.message_generator import generate_test_messages
+import asyncio
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
-# Generate test messages
-TEST_MESSAGES = generate_test_messages(50)
+import numpy as np
+from tenacity import retry, retry_if_result, stop_after_attempt, wait_exponential
+
+from src.rag_implementations import (
+    DEFAULT_SUMMARY_MODEL,
+    GEMINI_HIGH_QUALITY_MODEL,
+    GEMINI_SUMMARY_MODEL,
+    HIGH_QUALITY_MODEL,
+    ISO20022RAG
+)
+from src.evaluation import SCORE_NAMES, ISO20022Evaluator
+from src.semantic_cache import SemanticCache
+from data.message_generator import DEFAULT_MESSAGE_TYPES, ISO20022MessageGenerator
+from config import (
+    CASCADE_THRESHOLD,
+    COMPARISON_CHECKPOINT_PATH,
+    RAG_CACHE_PATH,
+    SEMANTIC_CACHE_PATH,
+    SEMANTIC_CACHE_THRESHOLD
+)
+
+# Models compared by run_model_comparison, keyed as in its results, per
+# query tier: the fast models for extraction, the larger ones for analysis
+COMPARISON_MODELS = {
+    "gpt": {"cheap": DEFAULT_SUMMARY_MODEL, "premium": HIGH_QUALITY_MODEL},
+    "gemini": {"cheap": GEMINI_SUMMARY_MODEL, "premium": GEMINI_HIGH_QUALITY_MODEL}
+}
+
+# Scenario categories whose queries need analysis rather than extraction and
+# go to the premium tier; a query's own "tier" key overrides its category
+PREMIUM_CATEGORIES = frozenset({"Compliance", "Business", "Risk Assessment", "Cross-Border"})
+
+# RAG methods compared by run_model_comparison, keyed as in its results
+COMPARISON_METHODS = ("simple", "context", "reranker")
+
+# Display names for models and RAG methods in the comparison report
+COMPARISON_LABELS = {
+    "gpt": "GPT",
+    "gemini": "Gemini",
+    "simple": "Simple RAG",
+    "context": "Context-Enriched RAG",
+    "reranker": "Reranker RAG"
+}
+
+# Default number of LLM calls in flight during a comparison run
+DEFAULT_CONCURRENCY = 10
+
+# Result type of the calls run by _run_bounded
+T = TypeVar("T")
+
+# In cascade mode the reference model answers first, and the cascaded model is
+# only asked queries whose reference answer scores below the cascade threshold
+CASCADE_REFERENCE_MODEL = "gpt"
+CASCADE_SKIPPED_MODEL = "gemini"
+
+# The evaluation scores a reference answer is gated on. The term densities and
+# readability rarely approach the threshold even for a correct answer, so the
+# gate uses only the checks a complete factual answer can max out
+CASCADE_SCORE_NAMES = ("numeric_accuracy", "currency_accuracy")
+
+# Recorded in place of a response the cascade skipped
+CASCADE_SKIPPED = "Skipped: the GPT answer met the cascade threshold"
+
+# Fragments of provider error messages that indicate rate limiting
+_RATE_LIMIT_MARKERS = ("429", "rate limit", "exhausted", "quota")
+
+# Test messages generated per message type (about 50 in total)
+TEST_MESSAGES_PER_TYPE = 12
+
+@lru_cache(maxsize=1)
+def get_test_messages() -> Dict[str, List[str]]:
+    """Generate the test messages on first use, keyed by message type.
+    
+    Messages are seeded fixtures, so every run tests the same XML and the
+    response caches and checkpoint carry over between runs.
+    """
+    generator = ISO20022MessageGenerator()
+    return {
+        msg_type: [generator.generate_fixture(msg_type, seed) for seed in range(TEST_MESSAGES_PER_TYPE)]
+        for msg_type in DEFAULT_MESSAGE_TYPES
+    }
 
 # Comprehensive test scenarios
-TEST_SCENARIOS = [
+_SCENARIO_DEFINITIONS = [
     # Basic Message Understanding
     {
         "category": "Basic Understanding",
@@ -217,228 +302,546 @@ TEST_SCENARIOS = [
     }
 ]
 
-def run_model_comparison(openai_key: str = None, gemini_key: str = None):
-    """Run comparison tests between GPT and Gemini."""
-    # Initialize RAG system
-    rag = ISO20022RAG(openai_key=openai_key, gemini_key=gemini_key)
+# Read-only scenarios, so the per-type selections below cannot go stale
+TEST_SCENARIOS = tuple(
+    MappingProxyType({**scenario, "queries": tuple(scenario["queries"])})
+    for scenario in _SCENARIO_DEFINITIONS
+)
+
+# Scenario categories tested for every message type
+COMMON_CATEGORIES = ("Basic Understanding", "Technical", "Error Handling")
+
+# Additional scenario categories per message type
+TYPE_CATEGORIES = {
+    "pacs.008": ("Payment Processing", "Compliance", "Cross-Border", "Business"),
+    "pacs.002": ("Error Handling", "Status Updates"),
+    "camt.053": ("Reconciliation", "Business", "Technical"),
+    "pain.001": ("Payment Processing", "Business", "Compliance")
+}
+
+def _select_scenarios(categories: Tuple[str, ...]) -> tuple:
+    """Return the scenarios in the given categories, in TEST_SCENARIOS order."""
+    return tuple(s for s in TEST_SCENARIOS if s["category"] in categories)
+
+# Relevant scenarios per message type, selected once at import
+_COMMON_SCENARIOS = _select_scenarios(COMMON_CATEGORIES)
+_RELEVANT_SCENARIOS = MappingProxyType({
+    msg_type: _select_scenarios(COMMON_CATEGORIES + categories)
+    for msg_type, categories in TYPE_CATEGORIES.items()
+})
+
+def _message_label(msg_type: str, index: int) -> str:
+    """Label the index-th tested message of a type in result keys and reports.
     
-    # Generate test messages
-    messages = TEST_MESSAGES
-    
-    results = {
-        "gpt": {
-            "simple": {},
-            "context": {},
-            "reranker": {}
-        },
-        "gemini": {
-            "simple": {},
-            "context": {},
-            "reranker": {}
-        },
-        "total_messages": len(messages),
-        "total_queries": sum(len(s["queries"]) for s in TEST_SCENARIOS),
-        "best_method": None,
-        "avg_rouge1": 0.0,
-        "avg_readability": 0.0
-    }
+    The first message keeps the bare message type, so single-message runs
+    produce the same keys as before.
+    """
+    return msg_type if index == 0 else f"{msg_type}#{index + 1}"
+
+def _is_scorable(response: str) -> bool:
+    """Return whether a recorded response is a model answer that can be evaluated."""
+    return bool(response) and not response.startswith(("Error", CASCADE_SKIPPED))
+
+def _overall_score(evaluation: dict) -> float:
+    """Average an evaluate_response result's scores into one number."""
+    scores = evaluation["scores"]
+    return sum(scores.values()) / len(scores) if scores else 0.0
+
+def _cascade_score(evaluation: dict) -> float:
+    """Average the CASCADE_SCORE_NAMES scores of an evaluate_response result."""
+    scores = evaluation["scores"]
+    if not scores:
+        return 0.0
+    return sum(scores[name] for name in CASCADE_SCORE_NAMES) / len(CASCADE_SCORE_NAMES)
+
+def _is_rate_limited(response: str) -> bool:
+    """Whether an error response from _call_llm reports a provider rate limit."""
+    if not response.startswith("Error"):
+        return False
+    response_lower = response.lower()
+    return any(marker in response_lower for marker in _RATE_LIMIT_MARKERS)
+
+@retry(
+    retry=retry_if_result(_is_rate_limited),
+    wait=wait_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(5),
+    retry_error_callback=lambda state: state.outcome.result()
+)
+def _summarize_with_retry(summarize: Callable, message_data: dict, model_name: str, query: str) -> str:
+    """Run one RAG summary, backing off exponentially while rate limited."""
+    try:
+        return summarize(message_data, model_name=model_name, query=query)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@retry(
+    retry=retry_if_result(lambda answers: any(map(_is_rate_limited, answers))),
+    wait=wait_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(5),
+    retry_error_callback=lambda state: state.outcome.result()
+)
+def _answer_packed_with_retry(
+    rag: ISO20022RAG,
+    message_data: dict,
+    queries: List[str],
+    method: str,
+    model_name: str
+) -> List[str]:
+    """Answer several queries in one packed LLM call, backing off while rate limited."""
+    try:
+        return rag.multi_query_summary(message_data, queries, method, model_name)
+    except Exception as e:
+        return [f"Error: {str(e)}"] * len(queries)
+
+class ComparisonCheckpoint:
+    """Append-only JSONL log of comparison answers, for resuming interrupted runs.
+    
+    Each fresh answer is written and flushed as soon as it arrives, keyed by
+    (model, method, prompt fingerprint, query), so a rerun skips every call
+    that already succeeded with the same prompts. A run that completes
+    without failures discards the file, so only an interrupted or partly
+    failed run is resumed. A path of None disables checkpointing.
+    """
     
-    for msg_type, msg_list in messages.items():
-        print(f"\n🔄 Testing {msg_type} Messages\n")
-        print("=" * 80)
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._answers: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._file = None
         
-        # Test first message of each type
-        message = msg_list[0]
-        message_data = rag.parse_iso_message(message)
+        if path:
+            torn = os.path.exists(path) and self._load()
+            self._file = open(path, "a", encoding="utf-8")
+            if torn:
+                # Terminate the torn line so the next record starts cleanly
+                self._file.write("\n")
+    
+    def __len__(self) -> int:
+        return len(self._answers)
+    
+    def get(self, key: tuple, query: str) -> Optional[str]:
+        """Return the checkpointed answer to a query under a (model, method, prompt fingerprint) key."""
+        return self._answers.get((*key, query))
+    
+    def record(self, key: tuple, query: str, response: str) -> None:
+        """Append an answer to the checkpoint file."""
+        if self._file is None:
+            return
+        model_name, method, message_key = key
+        line = json.dumps({
+            "model": model_name,
+            "method": method,
+            "message": message_key,
+            "query": query,
+            "response": response
+        })
+        with self._lock:
+            self._answers[(*key, query)] = response
+            self._file.write(line + "\n")
+            self._file.flush()
+    
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def discard(self) -> None:
+        """Close and delete the checkpoint file once its run has completed."""
+        self.close()
+        self._answers.clear()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def _load(self) -> bool:
+        """Read answers from an earlier run, skipping a line torn by an interruption.
         
-        # Find relevant scenarios for message type
-        relevant_scenarios = get_relevant_scenarios(msg_type)
+        Returns:
+            True if the file ends in a torn line
+        """
+        line = "\n"
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._answers[(record["model"], record["method"], record["message"], record["query"])] = record["response"]
+        return not line.endswith("\n")
+
+def _answer_queries(
+    rag: ISO20022RAG,
+    cache: SemanticCache,
+    checkpoint: ComparisonCheckpoint,
+    key: tuple,
+    message_data: dict,
+    queries: List[str],
+    query_vectors: dict,
+    pack: bool
+) -> List[str]:
+    """Answer queries about one message for a (model, method, prompt fingerprint) key.
+    
+    Checkpointed answers and semantic cache hits are served directly. The
+    misses are answered in one packed LLM call when `pack` is set, otherwise
+    with one call each, and checkpointed as they arrive.
+    """
+    model_name, method, _ = key
+    answers = [
+        checkpoint.get(key, query) or cache.lookup(key, query_vectors[query])
+        for query in queries
+    ]
+    missing = [i for i, answer in enumerate(answers) if answer is None]
+    
+    if pack and len(missing) > 1:
+        fresh = _answer_packed_with_retry(rag, message_data, [queries[i] for i in missing], method, model_name)
+    else:
+        summarize = partial(rag.summary, method=method)
+        fresh = [_summarize_with_retry(summarize, message_data, model_name, queries[i]) for i in missing]
+    
+    for i, answer in zip(missing, fresh):
+        answers[i] = answer
+        if not answer.startswith("Error"):
+            cache.store(key, query_vectors[queries[i]], answer)
+            checkpoint.record(key, queries[i], answer)
+    return answers
+
+async def _run_bounded(calls: List[Callable[[], T]], concurrency: int, batch_size: Optional[int]) -> List[T]:
+    """Run blocking LLM calls concurrently, at most `concurrency` at a time.
+    
+    Calls are submitted in batches of `batch_size` (all at once if None) and
+    results are returned in call order; a call that raises yields an
+    "Error: ..." string instead of aborting the run.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run(call: Callable[[], T]) -> T:
+            async with semaphore:
+                return await loop.run_in_executor(executor, call)
+        
+        results = []
+        step = batch_size or len(calls) or 1
+        for start in range(0, len(calls), step):
+            batch = await asyncio.gather(
+                *(run(call) for call in calls[start:start + step]),
+                return_exceptions=True
+            )
+            results.extend(
+                f"Error: {str(result)}" if isinstance(result, Exception) else result
+                for result in batch
+            )
+        return results
+
+def run_model_comparison(
+    openai_key: str = None,
+    gemini_key: str = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    batch_size: Optional[int] = None,
+    pack_queries: bool = True,
+    checkpoint_path: Optional[str] = COMPARISON_CHECKPOINT_PATH,
+    messages_per_type: int = 1,
+    cascade: bool = False,
+    cascade_threshold: float = CASCADE_THRESHOLD
+):
+    """Run comparison tests between GPT and Gemini.
+    
+    Args:
+        openai_key: OpenAI API key
+        gemini_key: Gemini API key
+        concurrency: Maximum number of LLM calls in flight at once
+        batch_size: Number of calls submitted per batch (all at once if None)
+        pack_queries: Ask all of a message's queries in one LLM call per
+            (model, method) instead of one call per query
+        checkpoint_path: JSONL file answers are appended to as they arrive and
+            resumed from on the next run; None disables checkpointing
+        messages_per_type: Number of generated messages tested per message type
+        cascade: Ask Gemini only the queries whose GPT answer scores below
+            cascade_threshold, recording CASCADE_SKIPPED for the rest
+        cascade_threshold: Minimum average CASCADE_SCORE_NAMES score of a GPT
+            answer that skips the Gemini call
+    """
+    # Initialize RAG system and the semantic cache for near-duplicate queries
+    rag = ISO20022RAG(openai_key=openai_key, gemini_key=gemini_key, cache_path=RAG_CACHE_PATH)
+    semantic_cache = SemanticCache(SEMANTIC_CACHE_PATH, threshold=SEMANTIC_CACHE_THRESHOLD)
+    checkpoint = ComparisonCheckpoint(checkpoint_path)
+    if len(checkpoint):
+        print(f"Resuming from {checkpoint_path}: {len(checkpoint)} answers already recorded")
+    
+    evaluator = ISO20022Evaluator()
+    try:
+        # Generate test messages
+        messages = get_test_messages()
+        
+        results = {
+            "gpt": {
+                "simple": {},
+                "context": {},
+                "reranker": {}
+            },
+            "gemini": {
+                "simple": {},
+                "context": {},
+                "reranker": {}
+            },
+            "total_queries": sum(len(s["queries"]) for s in TEST_SCENARIOS),
+            "best_method": None,
+            "avg_rouge1": 0.0,
+            "avg_readability": 0.0,
+            "cascade_skipped": 0
+        }
+        
+        # Embed each distinct query once
+        query_vectors = {
+            test['query']: semantic_cache.embed(test['query'])
+            for scenario in TEST_SCENARIOS
+            for test in scenario['queries']
+        }
         
+        # Lay out each message type's queries in test order, with their positions
+        # grouped by model tier, then parse the messages tested of that type
+        plan = []
+        for msg_type, msg_list in messages.items():
+            relevant_scenarios = get_relevant_scenarios(msg_type)
+            queries = []
+            tier_positions = {}
+            for scenario in relevant_scenarios:
+                for test in scenario['queries']:
+                    tier_positions.setdefault(query_tier(scenario, test), []).append(len(queries))
+                    queries.append(test['query'])
+            
+            for index, message in enumerate(msg_list[:messages_per_type]):
+                # Build the prompt context once for every query, model and method
+                message_data = rag.prepare_message(rag.parse_iso_message(message))
+                plan.append((
+                    _message_label(msg_type, index),
+                    msg_type,
+                    relevant_scenarios,
+                    message_data,
+                    rag.prompt_fingerprint(message_data),
+                    queries,
+                    tier_positions
+                ))
+        results["total_messages"] = len(plan)
+        results["tested_messages"] = [(label, msg_type) for label, msg_type, *_ in plan]
+        
+        # Answers by (message label, model, method), then by query position
+        answers = {}
+        
+        def run_calls(models: List[str], skip: frozenset = frozenset()) -> None:
+            """Answer every planned query for the given models, except (message label, method, position)s in skip.
+            
+            Calls are one per (message, model, method, tier) with packed queries,
+            otherwise one per (message, query, model, method).
+            """
+            groups = []
+            calls = []
+            for label, _, _, message_data, message_key, queries, tier_positions in plan:
+                for model in models:
+                    for method in COMPARISON_METHODS:
+                        for tier, positions in tier_positions.items():
+                            positions = [position for position in positions if (label, method, position) not in skip]
+                            if not positions:
+                                continue
+                            for group in ([positions] if pack_queries else [[position] for position in positions]):
+                                groups.append(((label, model, method), group))
+                                calls.append(partial(
+                                    _answer_queries,
+                                    rag,
+                                    semantic_cache,
+                                    checkpoint,
+                                    (COMPARISON_MODELS[model][tier], method, message_key),
+                                    message_data,
+                                    [queries[position] for position in group],
+                                    query_vectors,
+                                    pack_queries
+                                ))
+            
+            for (group, positions), group_answers in zip(groups, asyncio.run(_run_bounded(calls, concurrency, batch_size))):
+                # A call that raised comes back as a single error string
+                if isinstance(group_answers, str):
+                    group_answers = [group_answers] * len(positions)
+                answers.setdefault(group, {}).update(zip(positions, group_answers))
+        
+        if not cascade:
+            run_calls(list(COMPARISON_MODELS))
+        else:
+            # Ask the reference model first, then the cascaded model only where
+            # the reference answer scored below the threshold
+            run_calls([model for model in COMPARISON_MODELS if model != CASCADE_SKIPPED_MODEL])
+            msg_types = dict(results["tested_messages"])
+            skip = frozenset(
+                (label, method, position)
+                for (label, model, method), by_position in answers.items()
+                if model == CASCADE_REFERENCE_MODEL
+                for position, response in by_position.items()
+                if _is_scorable(response)
+                and _cascade_score(evaluator.evaluate_response(response, msg_types[label])) >= cascade_threshold
+            )
+            run_calls([CASCADE_SKIPPED_MODEL], skip)
+            for label, method, position in skip:
+                answers.setdefault((label, CASCADE_SKIPPED_MODEL, method), {})[position] = CASCADE_SKIPPED
+            results["cascade_skipped"] = len(skip)
+            print(f"\nCascade: {len(skip)} {COMPARISON_LABELS[CASCADE_SKIPPED_MODEL]} answers skipped")
+        
+        # A complete run has nothing to resume: discard its checkpoint so the
+        # next run asks again rather than replaying these answers
+        failed = sum(
+            response.startswith("Error")
+            for by_position in answers.values()
+            for response in by_position.values()
+        )
+        if not failed:
+            checkpoint.discard()
+        elif checkpoint_path:
+            print(f"\n{failed} answers failed; keeping {checkpoint_path} to resume the rest")
+    finally:
+        checkpoint.close()
+        rag.close()
+    semantic_cache.save()
+    print(f"\nSemantic cache: {semantic_cache.hits} hits, {semantic_cache.misses} misses")
+    
+    # Record and report the responses in the same order they were planned
+    scored = []
+    for label, msg_type, relevant_scenarios, *_ in plan:
+        # Each message's report is written to stdout in one go
+        out = io.StringIO()
+        print(f"\n🔄 Testing {label} Messages\n", file=out)
+        print("=" * 80, file=out)
+        
+        position = -1
         for scenario in relevant_scenarios:
-            print(f"\n📝 Category: {scenario['category']}")
+            print(f"\n📝 Category: {scenario['category']}", file=out)
             
             for test in scenario['queries']:
-                print(f"\nTest: {test['name']}")
-                print(f"Query: {test['query']}")
-                print(f"Description: {test['description']}")
-                print("\nResponses:")
-                
-                # Test each RAG method with GPT
-                try:
-                    # Simple RAG
-                    gpt_simple = rag.simple_rag_summary(
-                        message_data,
-                        model_name="gpt-4",
-                        query=test['query']
-                    )
-                    results["gpt"]["simple"][f"{msg_type}_{test['name']}"] = gpt_simple
-                    print("\nGPT - Simple RAG:")
-                    print("-" * 40)
-                    print(gpt_simple)
-                    
-                    # Context-Enriched RAG
-                    gpt_context = rag.context_enriched_rag_summary(
-                        message_data,
-                        model_name="gpt-4",
-                        query=test['query']
-                    )
-                    results["gpt"]["context"][f"{msg_type}_{test['name']}"] = gpt_context
-                    print("\nGPT - Context-Enriched RAG:")
-                    print("-" * 40)
-                    print(gpt_context)
-                    
-                    # Reranker RAG
-                    gpt_reranker = rag.reranker_rag_summary(
-                        message_data,
-                        model_name="gpt-4",
-                        query=test['query']
-                    )
-                    results["gpt"]["reranker"][f"{msg_type}_{test['name']}"] = gpt_reranker
-                    print("\nGPT - Reranker RAG:")
-                    print("-" * 40)
-                    print(gpt_reranker)
-                except Exception as e:
-                    print(f"GPT Error: {str(e)}")
-                    results["gpt"]["simple"][f"{msg_type}_{test['name']}"] = f"Error: {str(e)}"
-                    results["gpt"]["context"][f"{msg_type}_{test['name']}"] = f"Error: {str(e)}"
-                    results["gpt"]["reranker"][f"{msg_type}_{test['name']}"] = f"Error: {str(e)}"
+                position += 1
+                test_key = f"{label}_{test['name']}"
+                print(f"\nTest: {test['name']}", file=out)
+                print(f"Query: {test['query']}", file=out)
+                print(f"Description: {test['description']}", file=out)
+                print(f"Tier: {query_tier(scenario, test)}", file=out)
+                print("\nResponses:", file=out)
                 
-                # Test each RAG method with Gemini
-                try:
-                    # Simple RAG
-                    gemini_simple = rag.simple_rag_summary(
-                        message_data,
-                        model_name="gemini-1.5-pro",
-                        query=test['query']
-                    )
-                    results["gemini"]["simple"][f"{msg_type}_{test['name']}"] = gemini_simple
-                    print("\nGemini - Simple RAG:")
-                    print("-" * 40)
-                    print(gemini_simple)
-                    
-                    # Context-Enriched RAG
-                    gemini_context = rag.context_enriched_rag_summary(
-                        message_data,
-                        model_name="gemini-1.5-pro",
-                        query=test['query']
-                    )
-                    results["gemini"]["context"][f"{msg_type}_{test['name']}"] = gemini_context
-                    print("\nGemini - Context-Enriched RAG:")
-                    print("-" * 40)
-                    print(gemini_context)
-                    
-                    # Reranker RAG
-                    gemini_reranker = rag.reranker_rag_summary(
-                        message_data,
-                        model_name="gemini-1.5-pro",
-                        query=test['query']
-                    )
-                    results["gemini"]["reranker"][f"{msg_type}_{test['name']}"] = gemini_reranker
-                    print("\nGemini - Reranker RAG:")
-                    print("-" * 40)
-                    print(gemini_reranker)
-                except Exception as e:
-                    print(f"Gemini Error: {str(e)}")
-                    results["gemini"]["simple"][f"{msg_type}_{test['name']}"] = f"Error: {str(e)}"
-                    results["gemini"]["context"][f"{msg_type}_{test['name']}"] = f"Error: {str(e)}"
-                    results["gemini"]["reranker"][f"{msg_type}_{test['name']}"] = f"Error: {str(e)}"
+                for model in COMPARISON_MODELS:
+                    for method in COMPARISON_METHODS:
+                        response = answers[(label, model, method)][position]
+                        results[model][method][test_key] = response
+                        scored.append((model, method, msg_type, test_key, response))
+                        print(f"\n{COMPARISON_LABELS[model]} - {COMPARISON_LABELS[method]}:", file=out)
+                        print("-" * 40, file=out)
+                        print(response, file=out)
                 
-                print("\n" + "=" * 80)
+                print("\n" + "=" * 80, file=out)
+        
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
     
-    # Calculate best method and averages
-    evaluator = ISO20022Evaluator()
-    all_responses = []
+    # Score every valid response once, then aggregate per model and method
     method_scores = {"gpt": {}, "gemini": {}}
+    valid = [entry for entry in scored if _is_scorable(entry[-1])]
     
-    for model in ["gpt", "gemini"]:
-        for method in ["simple", "context", "reranker"]:
-            responses = [r for r in results[model][method].values() if not r.startswith("Error")]
-            if responses:
-                validation_scores = [evaluator.ba_validation_check(r)["overall_score"] for r in responses]
-                avg_score = sum(validation_scores) / len(validation_scores)
-                method_scores[model][f"{method}_rag"] = avg_score
-                all_responses.extend(responses)
+    # Evaluations are kept so evaluate_responses can report them without re-scoring
+    evaluations = [evaluator.evaluate_response(response, msg_type) for _, _, msg_type, _, response in valid]
+    results["validations"] = {
+        f"{model}_{method}_{test_key}": evaluation
+        for (model, method, _, test_key, _), evaluation in zip(valid, evaluations)
+    }
     
-    # Initialize default values
+    # Initialize default values; ROUGE-1 needs reference summaries, which the
+    # comparison scenarios do not have, so avg_rouge1 stays at 0.0
     results["best_method"] = "No valid responses"
     results["avg_rouge1"] = 0.0
     results["avg_readability"] = 0.0
     results["method_scores"] = method_scores
     
-    # Calculate best method only if we have valid scores
-    for model in method_scores:
-        if method_scores[model]:
-            best_method = max(method_scores[model].items(), key=lambda x: x[1])[0]
-            best_score = method_scores[model][best_method]
-            if results["best_method"] == "No valid responses" or best_score > method_scores[results["best_method"].split(" - ")[0].lower()][results["best_method"].split(" - ")[1].lower().replace(" ", "_")]:
-                results["best_method"] = f"{model.upper()} - {best_method.replace('_', ' ').title()}"
+    results["compared_queries"] = 0
     
-    # Calculate averages only if we have valid responses
-    if all_responses:
-        results["avg_rouge1"] = sum(evaluator.evaluate_summaries([r])["Simple RAG"]["rouge1"] for r in all_responses) / len(all_responses)
-        results["avg_readability"] = sum(evaluator.evaluate_summaries([r])["Simple RAG"]["readability_score"] for r in all_responses) / len(all_responses)
+    if valid:
+        models, methods = (np.array(column) for column in list(zip(*valid))[:2])
+        all_scores = evaluator.score_matrix(evaluations)
+        evaluated = ~np.isnan(all_scores).any(axis=1)
+        
+        # Models are compared only on the (method, query) slots every model
+        # answered: a cascade-skipped Gemini slot is one the GPT answer scored
+        # well on, so counting GPT's answer alone would bias the comparison
+        answered = {}
+        for (model, method, _, test_key, _), ok in zip(valid, evaluated):
+            if ok:
+                answered.setdefault((method, test_key), set()).add(model)
+        shared = {slot for slot, slot_models in answered.items() if len(slot_models) == len(COMPARISON_MODELS)}
+        compared = evaluated & np.array([(method, test_key) in shared for _, method, _, test_key, _ in valid])
+        results["compared_queries"] = len(shared)
+        
+        # Failed evaluations have NaN rows, which the compared mask leaves out
+        overall = all_scores.mean(axis=1)
+        for model in method_scores:
+            for method in COMPARISON_METHODS:
+                mask = compared & (models == model) & (methods == method)
+                if mask.any():
+                    method_scores[model][f"{method}_rag"] = float(overall[mask].mean())
+        
+        # Highest average score wins; on a tie the earlier model and method
+        best = max(
+            ((score, model, method) for model, scores_by_method in method_scores.items()
+             for method, score in scores_by_method.items()),
+            key=itemgetter(0),
+            default=None
+        )
+        if best is not None:
+            _, model, method = best
+            results["best_method"] = f"{model.upper()} - {method.replace('_', ' ').title()}"
+        if evaluated.any():
+            results["avg_readability"] = float(all_scores[evaluated, SCORE_NAMES.index("readability")].mean())
     
     return results
 
-def get_relevant_scenarios(msg_type: str) -> list:
+def query_tier(scenario: dict, test: dict) -> str:
+    """Return the model tier ('cheap' or 'premium') a test query runs on."""
+    return test.get("tier") or ("premium" if scenario["category"] in PREMIUM_CATEGORIES else "cheap")
+
+def get_relevant_scenarios(msg_type: str) -> tuple:
     """Get relevant test scenarios for a message type."""
-    # Common scenarios for all messages
-    common_scenarios = ["Basic Understanding", "Technical", "Error Handling"]
-    
-    # Message-specific scenarios
-    type_scenarios = {
-        "pacs.008": ["Payment Processing", "Compliance", "Cross-Border", "Business"],
-        "pacs.002": ["Error Handling", "Status Updates"],
-        "camt.053": ["Reconciliation", "Business", "Technical"],
-        "pain.001": ["Payment Processing", "Business", "Compliance"]
-    }
-    
-    # Filter scenarios
-    relevant_categories = common_scenarios + type_scenarios.get(msg_type, [])
-    return [s for s in TEST_SCENARIOS if s["category"] in relevant_categories]
+    return _RELEVANT_SCENARIOS.get(msg_type, _COMMON_SCENARIOS)
 
 def evaluate_responses(evaluator: ISO20022Evaluator, results: dict, messages: dict):
-    """Evaluate and compare model responses."""
+    """Evaluate and compare model responses.
+    
+    Reuses the evaluations run_model_comparison stored in results["validations"],
+    scoring only responses it has no evaluation for.
+    """
     print("\n📊 Response Evaluation\n")
+    validations = results.get("validations", {})
+    tested = results.get("tested_messages") or [(msg_type, msg_type) for msg_type in messages]
     
-    for msg_type, msg_list in messages.items():
-        print(f"\nEvaluating {msg_type} Responses")
-        print("=" * 40)
+    for label, msg_type in tested:
+        # Each message's report is written to stdout in one go
+        out = io.StringIO()
+        print(f"\nEvaluating {label} Responses", file=out)
+        print("=" * 40, file=out)
         
         relevant_scenarios = get_relevant_scenarios(msg_type)
         
         for scenario in relevant_scenarios:
-            print(f"\nCategory: {scenario['category']}")
+            print(f"\nCategory: {scenario['category']}", file=out)
             
             for test in scenario['queries']:
-                test_key = f"{msg_type}_{test['name']}"
-                print(f"\nTest: {test['name']}")
+                test_key = f"{label}_{test['name']}"
+                print(f"\nTest: {test['name']}", file=out)
                 
-                # Evaluate GPT responses
-                print("\nGPT Results:")
-                for rag_type in ["simple", "context", "reranker"]:
-                    response = results["gpt"][rag_type].get(test_key, "")
-                    if response and not response.startswith("Error"):
-                        validation = evaluator.ba_validation_check(
-                            response,
-                            message_type=msg_type
-                        )
-                        print(f"\n{rag_type.title()} RAG:")
-                        print(f"Score: {validation['overall_score']:.2f} ({validation['status']})")
-                        print("Checks:", ", ".join(f"{k}: {v}" for k, v in validation["checks"].items()))
-                
-                # Evaluate Gemini responses
-                print("\nGemini Results:")
-                for rag_type in ["simple", "context", "reranker"]:
-                    response = results["gemini"][rag_type].get(test_key, "")
-                    if response and not response.startswith("Error"):
-                        validation = evaluator.ba_validation_check(
-                            response,
-                            message_type=msg_type
-                        )
-                        print(f"\n{rag_type.title()} RAG:")
-                        print(f"Score: {validation['overall_score']:.2f} ({validation['status']})")
-                        print("Checks:", ", ".join(f"{k}: {v}" for k, v in validation["checks"].items()))
+                for model in COMPARISON_MODELS:
+                    print(f"\n{COMPARISON_LABELS[model]} Results:", file=out)
+                    for rag_type in COMPARISON_METHODS:
+                        response = results[model][rag_type].get(test_key, "")
+                        if _is_scorable(response):
+                            validation = validations.get(f"{model}_{rag_type}_{test_key}")
+                            if validation is None:
+                                validation = evaluator.evaluate_response(response, msg_type)
+                            print(f"\n{rag_type.title()} RAG:", file=out)
+                            print(f"Score: {_overall_score(validation):.2f} ({validation['status']})", file=out)
+                            print("Checks:", ", ".join(f"{k}: {v}" for k, v in validation["scores"].items()), file=out)
+        
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
 
 def main():
     """Run the model comparison tests."""
@@ -450,14 +853,13 @@ def main():
         print("⚠️  Please set OPENAI_API_KEY and GEMINI_API_KEY environment variables")
         return
     
-    # Initialize RAG and evaluator
+    # run_model_comparison opens (and closes) the RAG system and its response cache itself
     print("🚀 Initializing ISO 20022 RAG System...")
-    rag = ISO20022RAG(openai_key=openai_key, gemini_key=gemini_key)
     evaluator = ISO20022Evaluator()
     
     # Generate test messages
     print("📝 Generating test messages...")
-    messages = TEST_MESSAGES
+    messages = get_test_messages()
     
     # Run tests
     results = run_model_comparison(openai_key=openai_key, gemini_key=gemini_key)
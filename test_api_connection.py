@@ -1,58 +1,85 @@
 """Test script to verify API connections for both GPT and Gemini."""
 
+import asyncio
 import os
-from openai import OpenAI
+from typing import Tuple
+from openai import AsyncOpenAI
 import google.generativeai as genai
 from config import OPENAI_API_KEY, GEMINI_API_KEY, GEMINI_MODEL
+from src.rag_implementations import (
+    HIGH_QUALITY_MODEL,
+    OPENAI_MAX_RETRIES,
+    OPENAI_TIMEOUT,
+    async_openai_http_client
+)
 
-def test_openai_connection():
-    """Test OpenAI API connection."""
-    print("\n🔄 Testing OpenAI API connection...")
+# Each probe asks for a single token: a reply proves the connection works
+PROBE_PROMPT = "Hello, can you hear me?"
+PROBE_MAX_TOKENS = 1
+
+async def test_openai_connection() -> Tuple[bool, str]:
+    """Test OpenAI API connection.
+
+    Returns:
+        (success, report), so concurrent probes can print without interleaving
+    """
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": "Hello, can you hear me?"}],
-            temperature=0.3
-        )
-        print("✅ OpenAI API connection successful!")
-        print(f"Response: {response.choices[0].message.content}")
-        return True
+        async with AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=OPENAI_TIMEOUT,
+            max_retries=OPENAI_MAX_RETRIES,
+            http_client=async_openai_http_client()
+        ) as client:
+            response = await client.chat.completions.create(
+                model=HIGH_QUALITY_MODEL,
+                messages=[{"role": "user", "content": PROBE_PROMPT}],
+                max_tokens=PROBE_MAX_TOKENS
+            )
+        return True, f"✅ OpenAI API connection successful!\nResponse: {response.choices[0].message.content}"
     except Exception as e:
-        print(f"❌ OpenAI API connection failed: {str(e)}")
-        return False
+        return False, f"❌ OpenAI API connection failed: {str(e)}"
 
-def test_gemini_connection():
-    """Test Gemini API connection."""
-    print("\n🔄 Testing Gemini API connection...")
+async def test_gemini_connection() -> Tuple[bool, str]:
+    """Test Gemini API connection.
+
+    Returns:
+        (success, report), so concurrent probes can print without interleaving
+    """
     try:
         genai.configure(api_key=GEMINI_API_KEY)
         model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content("Hello, can you hear me?")
-        print("✅ Gemini API connection successful!")
-        print(f"Response: {response.text}")
-        return True
+        response = await model.generate_content_async(
+            PROBE_PROMPT,
+            generation_config={"max_output_tokens": PROBE_MAX_TOKENS},
+            request_options={"timeout": OPENAI_TIMEOUT, "retry": None}
+        )
+        return True, f"✅ Gemini API connection successful!\nResponse: {response.text}"
     except Exception as e:
-        print(f"❌ Gemini API connection failed: {str(e)}")
-        return False
+        return False, f"❌ Gemini API connection failed: {str(e)}"
+
+async def run_probes() -> Tuple[Tuple[bool, str], Tuple[bool, str]]:
+    """Probe both APIs concurrently, so the wait is the slower round trip rather than the sum."""
+    return await asyncio.gather(test_openai_connection(), test_gemini_connection())
 
 def main():
     """Run API connection tests."""
     print("🚀 Starting API Connection Tests")
     print("=" * 80)
-    
-    openai_success = test_openai_connection()
-    gemini_success = test_gemini_connection()
-    
+
+    print("\n🔄 Testing OpenAI and Gemini API connections...")
+    (openai_success, openai_report), (gemini_success, gemini_report) = asyncio.run(run_probes())
+    print(f"\n{openai_report}")
+    print(f"\n{gemini_report}")
+
     print("\n📊 Summary:")
     print("-" * 40)
     print(f"OpenAI API: {'✅ Connected' if openai_success else '❌ Failed'}")
     print(f"Gemini API: {'✅ Connected' if gemini_success else '❌ Failed'}")
-    
+
     if not openai_success or not gemini_success:
         print("\n⚠️  Please check your API keys and make sure the APIs are enabled.")
         return 1
     return 0
 
 if __name__ == "__main__":
-    exit(main()) 
\ No newline at end of file
+    exit(main())
@@ -1,15 +1,47 @@
 """Streamlit UI for ISO20022 RAG Comparison."""
 
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, as_completed
+from functools import partial
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Coroutine, Dict, Iterator, List, Optional, Tuple, TypeVar
 import os
 
-from src.rag_implementations import ISO20022RAG
-from src.hybrid_rag import HybridRAG
-from src.evaluation import ISO20022Evaluator
-from data.message_generator import ISO20022MessageGenerator
+# Plotting, pandas, the API clients and the RAG modules are imported where
+# they are used, so a rerun that never reaches them skips their import cost
+if TYPE_CHECKING:
+    import httpx
+    import pandas as pd
+    import plotly.graph_objects as go
+    from src.rag_implementations import ISO20022RAG
+    from src.hybrid_rag import HybridRAG
+    from src.evaluation import ISO20022Evaluator
+
+T = TypeVar("T")
+
+# RAG method name behind each single-method RAG choice
+RAG_TYPE_METHODS = {
+    "Simple RAG": "simple",
+    "Context-Enriched RAG": "context",
+    "Reranker RAG": "reranker"
+}
+
+# Every RAG implementation choice, in display order
+RAG_TYPES = [*RAG_TYPE_METHODS, "🔄 Hybrid RAG"]
+
+# Model behind each model choice
+MODEL_NAMES = {
+    "GPT-4": "gpt-4",
+    "Gemini": "gemini-1.5-pro"
+}
+
+# Most messages the Batch Summary can generate in one run
+MAX_BATCH_MESSAGES = 100
+
+# Streamed text is flushed to the page at most this often (~15 updates/second)
+STREAM_FLUSH_INTERVAL = 0.066
 
 # Set page config
 st.set_page_config(
@@ -18,17 +50,443 @@ st.set_page_config(
     layout="wide"
 )
 
-def init_rag(openai_key: Optional[str] = None, gemini_key: Optional[str] = None) -> Tuple[Optional[ISO20022RAG], Optional[ISO20022Evaluator], Optional[HybridRAG]]:
+@st.cache_resource(show_spinner=False)
+def _http_clients() -> Tuple["httpx.Client", "httpx.AsyncClient"]:
+    """Pooled (sync, async) HTTP clients shared by every RAG instance across reruns and sessions.
+
+    Keep-alive connections survive reruns, so repeated calls skip the TCP and TLS setup.
+    """
+    from src.rag_implementations import async_openai_http_client, openai_http_client
+    
+    return openai_http_client(), async_openai_http_client()
+
+@st.cache_resource(show_spinner=False)
+def _build_rag(openai_key: Optional[str], gemini_key: Optional[str]) -> Tuple["ISO20022RAG", "ISO20022Evaluator", "HybridRAG"]:
+    """Build the RAG implementations once per pair of API keys.
+
+    Streamlit reruns the whole script on every interaction; caching the
+    resource keeps one set of clients and caches alive across reruns and sessions.
+    Failures raise, so they are never cached.
+    """
+    from src.rag_implementations import ISO20022RAG
+    from src.hybrid_rag import HybridRAG
+    from src.evaluation import ISO20022Evaluator
+    
+    rag = ISO20022RAG(openai_key=openai_key, gemini_key=gemini_key, http_clients=_http_clients())
+    evaluator = ISO20022Evaluator()
+    hybrid_rag = HybridRAG(openai_key=openai_key, gemini_key=gemini_key, http_clients=_http_clients())
+    return rag, evaluator, hybrid_rag
+
+def init_rag(openai_key: Optional[str] = None, gemini_key: Optional[str] = None) -> Tuple[Optional["ISO20022RAG"], Optional["ISO20022Evaluator"], Optional["HybridRAG"]]:
     """Initialize RAG implementations and evaluator with API keys."""
     try:
-        rag = ISO20022RAG(openai_key=openai_key, gemini_key=gemini_key)
-        evaluator = ISO20022Evaluator()
-        hybrid_rag = HybridRAG(openai_key=openai_key, gemini_key=gemini_key)
-        return rag, evaluator, hybrid_rag
+        return _build_rag(openai_key, gemini_key)
     except Exception as e:
         st.error(f"Error initializing RAG: {str(e)}")
         return None, None, None
 
+@st.cache_data(show_spinner=False, ttl=3600)
+def _gen_message(message_type: str, seed: int) -> str:
+    """Generate the seeded test message for a selection; repeat presses hit the cache."""
+    from data.message_generator import ISO20022MessageGenerator
+    
+    return ISO20022MessageGenerator().generate_fixture(message_type, seed)
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _parse_cached(_rag: "ISO20022RAG", text: str) -> Dict:
+    """Parse a generated message once; parsing does not depend on the API keys.
+    
+    The prompt context is attached too, so every RAG method and variant run
+    on the message reuses it instead of re-rendering the message. Cached as a
+    resource, the dict is shared by reference rather than hashed and copied
+    on every hit, so callers must not modify it.
+    """
+    return _rag.prepare_message(_rag.parse_iso_message(text))
+
+@st.cache_data(show_spinner=False)
+def _metrics_md() -> str:
+    """Read the static comparison metrics once instead of on every rerun."""
+    with open("comparison_metrics.md", "r") as f:
+        return f.read()
+
+# The comparison figures plot static data, so each is built once and shared by every rerun
+@st.cache_resource(show_spinner=False)
+def _quality_fig() -> "go.Figure":
+    """Response quality metrics for each RAG implementation and model."""
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    quality_data = {
+        'Model': ['GPT-4', 'GPT-4', 'GPT-4', 'GPT-4', 'Gemini', 'Gemini', 'Gemini', 'Gemini'],
+        'RAG Type': ['Simple', 'Context-Enriched', 'Reranker', 'Hybrid', 'Simple', 'Context-Enriched', 'Reranker', 'Hybrid'],
+        'Accuracy': [0.85, 0.88, 0.87, 0.91, 0.82, 0.85, 0.84, 0.89],
+        'Completeness': [0.80, 0.90, 0.85, 0.92, 0.78, 0.87, 0.83, 0.90],
+        'Relevance': [0.82, 0.89, 0.88, 0.93, 0.80, 0.86, 0.85, 0.91]
+    }
+    df = pd.DataFrame(quality_data)
+    labels = (df['RAG Type'] + ' (' + df['Model'] + ')').tolist()
+
+    fig = go.Figure()
+    for metric in ['Accuracy', 'Completeness', 'Relevance']:
+        fig.add_trace(go.Bar(
+            name=metric,
+            x=labels,
+            y=df[metric],
+            text=df[metric].map('{:.2f}'.format),
+            textposition='auto',
+        ))
+
+    fig.update_layout(
+        title='Response Quality Metrics',
+        barmode='group',
+        xaxis_title='RAG Implementation (Model)',
+        yaxis_title='Score',
+        yaxis_range=[0, 1]
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def _time_fig() -> "go.Figure":
+    """Processing time for each RAG implementation and model."""
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    time_data = {
+        'Model': ['GPT-4', 'GPT-4', 'GPT-4', 'GPT-4', 'Gemini', 'Gemini', 'Gemini', 'Gemini'],
+        'RAG Type': ['Simple', 'Context-Enriched', 'Reranker', 'Hybrid', 'Simple', 'Context-Enriched', 'Reranker', 'Hybrid'],
+        'Processing Time (s)': [1.2, 1.8, 2.1, 2.3, 0.9, 1.5, 1.8, 2.0]
+    }
+    df = pd.DataFrame(time_data)
+    labels = (df['RAG Type'] + ' (' + df['Model'] + ')').tolist()
+
+    fig = go.Figure(data=[
+        go.Bar(
+            name='Processing Time',
+            x=labels,
+            y=df['Processing Time (s)'],
+            text=df['Processing Time (s)'].map('{:.1f}s'.format),
+            textposition='auto',
+        )
+    ])
+
+    fig.update_layout(
+        title='Processing Time Comparison',
+        xaxis_title='RAG Implementation (Model)',
+        yaxis_title='Time (seconds)'
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def _memory_fig() -> "go.Figure":
+    """Memory usage for each RAG implementation and model."""
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    memory_data = {
+        'Model': ['GPT-4', 'GPT-4', 'GPT-4', 'GPT-4', 'Gemini', 'Gemini', 'Gemini', 'Gemini'],
+        'RAG Type': ['Simple', 'Context-Enriched', 'Reranker', 'Hybrid', 'Simple', 'Context-Enriched', 'Reranker', 'Hybrid'],
+        'Memory (MB)': [150, 180, 200, 220, 140, 170, 190, 210]
+    }
+    df = pd.DataFrame(memory_data)
+    labels = (df['RAG Type'] + ' (' + df['Model'] + ')').tolist()
+
+    fig = go.Figure(data=[
+        go.Bar(
+            name='Memory Usage',
+            x=labels,
+            y=df['Memory (MB)'],
+            text=df['Memory (MB)'].map('{}MB'.format),
+            textposition='auto',
+        )
+    ])
+
+    fig.update_layout(
+        title='Memory Usage Comparison',
+        xaxis_title='RAG Implementation (Model)',
+        yaxis_title='Memory (MB)'
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """Start one event loop in a background thread for every async LLM call.
+
+    The async API clients are bound to the loop they first ran on, so all
+    reruns submit to this long-lived loop rather than a fresh asyncio.run loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def _run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop()).result()
+
+@st.cache_resource(show_spinner=False)
+def _in_flight_requests() -> Dict[Tuple, "asyncio.Future[Any]"]:
+    """Requests running on the shared event loop, by request key; only touched from that loop."""
+    return {}
+
+async def _coalesced(
+    in_flight: Dict[Tuple, "asyncio.Future[Any]"],
+    key: Tuple,
+    make_coro: Callable[[], Coroutine[Any, Any, T]]
+) -> T:
+    """Await the request already in flight for key, or start it with make_coro."""
+    pending = in_flight.get(key)
+    if pending is None:
+        pending = in_flight[key] = asyncio.ensure_future(make_coro())
+        pending.add_done_callback(lambda _: in_flight.pop(key, None))
+    # Shielded, so one caller giving up does not cancel the others' shared request
+    return await asyncio.shield(pending)
+
+def _submit(key: Tuple, make_coro: Callable[[], Coroutine[Any, Any, T]]) -> "Future[T]":
+    """Submit a request to the shared event loop, joining an identical one already in flight.
+    
+    Requests from every session run on the same loop, so concurrent identical
+    calls from other users or tabs share one upstream call.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        _coalesced(_in_flight_requests(), key, make_coro),
+        _event_loop()
+    )
+
+def _coalesce_chunks(chunks: Iterator[str], interval: float = STREAM_FLUSH_INTERVAL) -> Iterator[str]:
+    """Join streamed text chunks so the page is updated at most once per interval."""
+    pending = []
+    flushed_at = time.monotonic()
+    for chunk in chunks:
+        pending.append(chunk)
+        now = time.monotonic()
+        if now - flushed_at >= interval:
+            yield "".join(pending)
+            pending = []
+            flushed_at = now
+    if pending:
+        yield "".join(pending)
+
+def _api_keys_hash(rag: "ISO20022RAG") -> str:
+    """Hash the API keys a RAG instance was built with.
+    
+    Responses cached or coalesced across sessions are keyed on it, so a
+    session only reuses responses produced under its own keys.
+    """
+    import hashlib
+    
+    return hashlib.sha256(f"{rag.openai_key or ''}\0{rag.gemini_key or ''}".encode("utf-8")).hexdigest()
+
+class _UncachedResult(Exception):
+    """Carries a failed call's result out of a cached function without caching it."""
+
+    def __init__(self, result: Any):
+        super().__init__()
+        self.result = result
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=256)
+def _cached_rag_call(
+    rag_type: str,
+    model_name: str,
+    msg_hash: str,
+    query: Optional[str],
+    keys_hash: str,
+    _message_data: Dict
+) -> Any:
+    """Run one live-testing RAG call, cached on the message content hash.
+    
+    The message data itself is left unhashed (underscore argument); msg_hash
+    identifies it. keys_hash scopes the process-wide cache to the session's
+    API keys. A single-method response is streamed into the page, and a
+    cache hit replays the streamed element.
+    """
+    if rag_type == "🔄 Hybrid RAG":
+        # The three method calls run concurrently on the shared event loop
+        hybrid_rag = st.session_state.hybrid_rag
+        result = _submit(
+            ("analysis", model_name, msg_hash, query, keys_hash),
+            lambda: hybrid_rag.analyze_message_async(_message_data, model_name, query)
+        ).result()
+        failed = any(response.startswith("Error") for response in result['all_responses'].values())
+    else:
+        # Stream the selected RAG's response as it is generated
+        result = st.write_stream(_coalesce_chunks(st.session_state.rag.summary_stream(
+            _message_data,
+            RAG_TYPE_METHODS[rag_type],
+            model_name,
+            query
+        )))
+        failed = result.startswith("Error")
+    if failed:
+        raise _UncachedResult(result)
+    return result
+
+def _rag_call(rag_type: str, model_name: str, message_data: Dict, query: Optional[str]) -> Any:
+    """Dispatch a live-testing RAG call; identical calls within the hour reuse the response.
+    
+    Returns:
+        The hybrid analysis dict, or the single-method response text
+    """
+    from src.semantic_cache import message_hash
+    
+    try:
+        return _cached_rag_call(
+            rag_type,
+            model_name,
+            message_hash(message_data),
+            query,
+            _api_keys_hash(st.session_state.rag),
+            message_data
+        )
+    except _UncachedResult as e:
+        return e.result
+
+def _show_message(test_message: str) -> None:
+    """Show a generated message in a collapsed expander."""
+    with st.expander("View Generated Message"):
+        st.code(test_message, language="xml")
+
+def _show_analysis(analysis: Dict) -> None:
+    """Show a Hybrid RAG analysis: summary, confidence scores, weights and every method's response."""
+    st.markdown("### Summary")
+    st.write(analysis['summary'])
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("### Confidence Scores")
+        for method, score in analysis['confidence_scores'].items():
+            st.progress(score, text=f"{method}: {score:.2f}")
+    
+    with col2:
+        st.markdown("### Method Weights")
+        for method, weight in analysis['metadata']['final_weights'].items():
+            st.progress(weight, text=f"{method}: {weight:.2f}")
+    
+    with st.expander("View All Responses"):
+        for method, response in analysis['all_responses'].items():
+            st.markdown(f"**{method}**")
+            st.write(response)
+            st.markdown("---")
+
+def _show_metrics(metrics: Dict) -> None:
+    """Show a response's evaluation metrics."""
+    st.subheader("Evaluation Metrics")
+    st.json(metrics)
+
+async def _variant_summary(
+    rag: "ISO20022RAG",
+    hybrid_rag: "HybridRAG",
+    rag_type: str,
+    model_name: str,
+    message_data: Dict,
+    query: Optional[str]
+) -> str:
+    """Summarize a message with one (RAG type, model) variant.
+    
+    Runs on the shared event loop's thread, which has no session state, so
+    the RAG instances are passed in.
+    """
+    if rag_type == "🔄 Hybrid RAG":
+        analysis = await hybrid_rag.analyze_message_async(message_data, model_name, query)
+        return analysis['summary']
+    responses = await rag.summary_many([message_data], RAG_TYPE_METHODS[rag_type], model_name, query)
+    return responses[0]
+
+def _live_comparison(message_type: str, query: Optional[str], seed: int = 0) -> None:
+    """Run every (model, RAG type) variant on one message concurrently, filling a grid as each finishes."""
+    from src.semantic_cache import message_hash
+    
+    message_data = _parse_cached(st.session_state.rag, _gen_message(message_type, seed))
+    msg_hash = message_hash(message_data)
+    rag, hybrid_rag = st.session_state.rag, st.session_state.hybrid_rag
+    keys_hash = _api_keys_hash(rag)
+    placeholders = {}
+    for model in MODEL_NAMES:
+        for column, rag_type in zip(st.columns(len(RAG_TYPES)), RAG_TYPES):
+            with column:
+                st.markdown(f"**{rag_type} ({model})**")
+                placeholders[(model, rag_type)] = st.empty()
+                placeholders[(model, rag_type)].caption("Waiting...")
+    
+    # Submitted together, so the grid takes as long as the slowest variant
+    futures = {
+        _submit(
+            ("summary", rag_type, MODEL_NAMES[model], msg_hash, query, keys_hash),
+            partial(_variant_summary, rag, hybrid_rag, rag_type, MODEL_NAMES[model], message_data, query)
+        ): (model, rag_type)
+        for model, rag_type in placeholders
+    }
+    for future in as_completed(futures):
+        try:
+            response = future.result()
+        except Exception as e:
+            response = f"Error: {str(e)}"
+        placeholders[futures[future]].write(response)
+
+def _batch_summaries(
+    message_type: str,
+    first_seed: int,
+    count: int,
+    model_name: str,
+    query: Optional[str],
+    use_batch_api: bool = False
+) -> "pd.DataFrame":
+    """Generate count seeded messages of one type and summarize them with batch_summary.
+    
+    batch_summary packs several messages into each LLM request and sends the
+    requests together, so N messages cost a few round trips rather than N.
+    With use_batch_api a Gemini model's requests go out as one Batch API job.
+    
+    Returns:
+        One row per message: its seed, summary and evaluation status
+    """
+    import pandas as pd
+    
+    seeds = range(first_seed, first_seed + count)
+    messages = [_parse_cached(st.session_state.rag, _gen_message(message_type, seed)) for seed in seeds]
+    summaries = st.session_state.rag.batch_summary(messages, model_name, query, use_batch_api=use_batch_api)
+    evaluations = st.session_state.evaluator.evaluate_responses(summaries, [message_type] * count)
+    return pd.DataFrame({
+        'Seed': list(seeds),
+        'Summary': summaries,
+        'Status': [evaluation['status'] for evaluation in evaluations]
+    })
+
+def _batch_evaluate(model_name: str, seed: int = 0) -> "pd.DataFrame":
+    """Summarize one seeded message of each type with every single-method RAG and score them.
+    
+    All summaries are requested concurrently and scored in one evaluate_responses call.
+    
+    Returns:
+        One row of scores per (message type, RAG method)
+    """
+    import pandas as pd
+    from data.message_generator import DEFAULT_MESSAGE_TYPES
+    
+    rag = st.session_state.rag
+    messages = [_parse_cached(st.session_state.rag, _gen_message(msg_type, seed)) for msg_type in DEFAULT_MESSAGE_TYPES]
+    rag_types = list(RAG_TYPE_METHODS)
+    
+    async def summarize_all() -> List[List[str]]:
+        return await asyncio.gather(*(
+            rag.summary_many(messages, RAG_TYPE_METHODS[rag_type], model_name)
+            for rag_type in rag_types
+        ))
+    
+    summaries = _run_async(summarize_all())
+    pairs = [
+        (rag_type, msg_type, summary)
+        for rag_type, responses in zip(rag_types, summaries)
+        for msg_type, summary in zip(DEFAULT_MESSAGE_TYPES, responses)
+    ]
+    evaluations = st.session_state.evaluator.evaluate_responses(
+        [summary for _, _, summary in pairs],
+        [msg_type for _, msg_type, _ in pairs]
+    )
+    return pd.DataFrame([
+        {'Message Type': msg_type, 'RAG Type': rag_type, 'Status': evaluation['status'], **evaluation['scores']}
+        for (rag_type, msg_type, _), evaluation in zip(pairs, evaluations)
+    ])
+
 # Initialize session state
 if 'openai_key' not in st.session_state:
     st.session_state.openai_key = os.getenv("OPENAI_API_KEY", "")
@@ -42,6 +500,8 @@ if 'hybrid_rag' not in st.session_state:
     st.session_state.hybrid_rag = None
 if 'api_keys_valid' not in st.session_state:
     st.session_state.api_keys_valid = False
+if 'last_run' not in st.session_state:
+    st.session_state.last_run = None
 
 # Title and description
 st.title("ISO20022 RAG and Model Comparison Dashboard")
@@ -52,11 +512,12 @@ implementations and language models (GPT-4 and Gemini) for processing ISO20022 f
 
 # API Key Configuration in Sidebar
 st.sidebar.title("API Configuration")
-with st.sidebar.expander("Configure API Keys", expanded=not st.session_state.api_keys_valid):
+# A form sends the keys in one rerun on submit rather than a rerun per edited field
+with st.sidebar.form("api_keys"):
     openai_key = st.text_input("OpenAI API Key", value=st.session_state.openai_key, type="password")
     gemini_key = st.text_input("Gemini API Key", value=st.session_state.gemini_key, type="password")
     
-    if st.button("Save and Validate API Keys"):
+    if st.form_submit_button("Save and Validate API Keys"):
         st.session_state.openai_key = openai_key
         st.session_state.gemini_key = gemini_key
         
@@ -79,8 +540,7 @@ if not st.session_state.api_keys_valid:
     # Show static content
     st.header("RAG and Model Comparisons")
     with st.expander("View Detailed Metrics"):
-        with open("comparison_metrics.md", "r") as f:
-            st.markdown(f.read())
+        st.markdown(_metrics_md())
 else:
     # Create main tabs
     overview_tab, live_testing_tab, comparison_tab = st.tabs(["Overview", "Live Testing", "Model Comparison"])
@@ -100,8 +560,7 @@ else:
         """)
         
         with st.expander("View Detailed Metrics"):
-            with open("comparison_metrics.md", "r") as f:
-                st.markdown(f.read())
+            st.markdown(_metrics_md())
 
     with live_testing_tab:
         st.header("Live Testing")
@@ -116,6 +575,9 @@ else:
                     ["pacs.008", "pacs.002", "camt.053", "pain.001"]
                 )
                 
+                # Seed: the same type and seed always give the same message
+                seed = st.number_input("Message Seed", min_value=0, value=0, step=1)
+                
                 # Optional query
                 query = st.text_input("Optional Query (e.g., 'Explain the payment details' or 'Check compliance')")
                 
@@ -129,7 +591,7 @@ else:
                 # RAG selection
                 rag_type = st.radio(
                     "Select RAG Implementation",
-                    ["Simple RAG", "Context-Enriched RAG", "Reranker RAG", "🔄 Hybrid RAG"],
+                    RAG_TYPES,
                     horizontal=True
                 )
             
@@ -137,96 +599,94 @@ else:
                 st.markdown("### Test Settings")
                 st.markdown("""
                 - **Message Type**: {}
+                - **Seed**: {}
                 - **Model**: {}
                 - **RAG Type**: {}
                 - **Query**: {}
                 """.format(
                     message_type,
+                    seed,
                     model,
                     rag_type,
                     query if query else "None"
                 ))
             
             # Generate test message
+            selection = (message_type, int(seed), model, rag_type, query)
             if st.button("Generate and Process Message"):
                 with st.spinner("Processing..."):
                     try:
                         # Generate message
-                        generator = ISO20022MessageGenerator()
-                        test_message = generator.generate_test_messages(1, [message_type])[0]
-                        
-                        with st.expander("View Generated Message"):
-                            st.code(test_message, language="xml")
+                        test_message = _gen_message(message_type, int(seed))
+                        _show_message(test_message)
                         
                         # Parse message
-                        message_data = st.session_state.rag.parse_iso_message(test_message)
+                        message_data = _parse_cached(st.session_state.rag, test_message)
                         
                         # Process with selected configuration
-                        model_name = "gpt-4" if model == "GPT-4" else "gemini-1.5-pro"
+                        model_name = MODEL_NAMES[model]
                         
                         st.subheader("Results")
                         
                         if rag_type == "🔄 Hybrid RAG":
-                            analysis = st.session_state.hybrid_rag.analyze_message(
-                                message_data,
-                                model_name,
-                                query if query else None
-                            )
-                            
-                            st.markdown("### Summary")
-                            st.write(analysis['summary'])
-                            
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                st.markdown("### Confidence Scores")
-                                for method, score in analysis['confidence_scores'].items():
-                                    st.progress(score, text=f"{method}: {score:.2f}")
-                            
-                            with col2:
-                                st.markdown("### Method Weights")
-                                for method, weight in analysis['metadata']['final_weights'].items():
-                                    st.progress(weight, text=f"{method}: {weight:.2f}")
-                            
-                            with st.expander("View All Responses"):
-                                for method, response in analysis['all_responses'].items():
-                                    st.markdown(f"**{method}**")
-                                    st.write(response)
-                                    st.markdown("---")
+                            result = _rag_call(rag_type, model_name, message_data, query if query else None)
+                            _show_analysis(result)
+                            summary = result['summary']
                         else:
-                            # Process with selected RAG
-                            if rag_type == "Simple RAG":
-                                result = st.session_state.rag.simple_rag_summary(
-                                    message_data,
-                                    model_name,
-                                    query if query else None
-                                )
-                            elif rag_type == "Context-Enriched RAG":
-                                result = st.session_state.rag.context_enriched_rag_summary(
-                                    message_data,
-                                    model_name,
-                                    query if query else None
-                                )
-                            else:  # Reranker RAG
-                                result = st.session_state.rag.reranker_rag_summary(
-                                    message_data,
-                                    model_name,
-                                    query if query else None
-                                )
-                            
                             st.markdown("### Summary")
-                            st.write(result)
+                            result = summary = _rag_call(rag_type, model_name, message_data, query if query else None)
                         
                         # Evaluation metrics
-                        st.subheader("Evaluation Metrics")
-                        metrics = st.session_state.evaluator.evaluate_response(
-                            analysis['summary'] if rag_type == "🔄 Hybrid RAG" else result,
-                            message_type
-                        )
-                        st.json(metrics)
+                        metrics = st.session_state.evaluator.evaluate_response(summary, message_type)
+                        _show_metrics(metrics)
+                        
+                        # Kept so later reruns can show this run without recomputing it
+                        st.session_state.last_run = {
+                            'selection': selection,
+                            'test_message': test_message,
+                            'result': result,
+                            'metrics': metrics
+                        }
                         
                     except Exception as e:
                         st.error(f"Error processing message: {str(e)}")
+            elif st.session_state.last_run and st.session_state.last_run['selection'] == selection:
+                # Any other interaction reruns the script: show the last run for this selection
+                last_run = st.session_state.last_run
+                _show_message(last_run['test_message'])
+                st.subheader("Results")
+                if rag_type == "🔄 Hybrid RAG":
+                    _show_analysis(last_run['result'])
+                else:
+                    st.markdown("### Summary")
+                    st.write(last_run['result'])
+                _show_metrics(last_run['metrics'])
+            
+            # Bulk generation: many messages summarized in a few packed requests
+            st.markdown("### Batch Summary")
+            message_count = st.number_input(
+                "Generate N messages",
+                min_value=1,
+                max_value=MAX_BATCH_MESSAGES,
+                value=5,
+                step=1
+            )
+            use_batch_api = model == "Gemini" and st.checkbox(
+                "Use the Gemini Batch API (about half the cost, but the job can take several minutes)"
+            )
+            if st.button("Generate and Summarize Batch"):
+                with st.spinner("Processing..."):
+                    try:
+                        st.dataframe(_batch_summaries(
+                            message_type,
+                            int(seed),
+                            int(message_count),
+                            MODEL_NAMES[model],
+                            query if query else None,
+                            use_batch_api
+                        ))
+                    except Exception as e:
+                        st.error(f"Error processing batch: {str(e)}")
         except Exception as e:
             st.error(f"Error in Live Testing: {str(e)}")
 
@@ -241,86 +701,33 @@ else:
             metric_tabs = st.tabs(["Response Quality", "Processing Time", "Memory Usage"])
             
             with metric_tabs[0]:
-                # Response Quality Comparison
-                quality_data = {
-                    'Model': ['GPT-4', 'GPT-4', 'GPT-4', 'GPT-4', 'Gemini', 'Gemini', 'Gemini', 'Gemini'],
-                    'RAG Type': ['Simple', 'Context-Enriched', 'Reranker', 'Hybrid', 'Simple', 'Context-Enriched', 'Reranker', 'Hybrid'],
-                    'Accuracy': [0.85, 0.88, 0.87, 0.91, 0.82, 0.85, 0.84, 0.89],
-                    'Completeness': [0.80, 0.90, 0.85, 0.92, 0.78, 0.87, 0.83, 0.90],
-                    'Relevance': [0.82, 0.89, 0.88, 0.93, 0.80, 0.86, 0.85, 0.91]
-                }
-                df = pd.DataFrame(quality_data)
-                
-                fig = go.Figure()
-                for metric in ['Accuracy', 'Completeness', 'Relevance']:
-                    fig.add_trace(go.Bar(
-                        name=metric,
-                        x=[f"{row['RAG Type']} ({row['Model']})" for _, row in df.iterrows()],
-                        y=df[metric],
-                        text=df[metric].apply(lambda x: f'{x:.2f}'),
-                        textposition='auto',
-                    ))
-                
-                fig.update_layout(
-                    title='Response Quality Metrics',
-                    barmode='group',
-                    xaxis_title='RAG Implementation (Model)',
-                    yaxis_title='Score',
-                    yaxis_range=[0, 1]
-                )
-                st.plotly_chart(fig)
+                st.plotly_chart(_quality_fig())
             
             with metric_tabs[1]:
-                # Processing Time Comparison
-                time_data = {
-                    'Model': ['GPT-4', 'GPT-4', 'GPT-4', 'GPT-4', 'Gemini', 'Gemini', 'Gemini', 'Gemini'],
-                    'RAG Type': ['Simple', 'Context-Enriched', 'Reranker', 'Hybrid', 'Simple', 'Context-Enriched', 'Reranker', 'Hybrid'],
-                    'Processing Time (s)': [1.2, 1.8, 2.1, 2.3, 0.9, 1.5, 1.8, 2.0]
-                }
-                df = pd.DataFrame(time_data)
-                
-                fig = go.Figure(data=[
-                    go.Bar(
-                        name='Processing Time',
-                        x=[f"{row['RAG Type']} ({row['Model']})" for _, row in df.iterrows()],
-                        y=df['Processing Time (s)'],
-                        text=df['Processing Time (s)'].apply(lambda x: f'{x:.1f}s'),
-                        textposition='auto',
-                    )
-                ])
-                
-                fig.update_layout(
-                    title='Processing Time Comparison',
-                    xaxis_title='RAG Implementation (Model)',
-                    yaxis_title='Time (seconds)'
-                )
-                st.plotly_chart(fig)
+                st.plotly_chart(_time_fig())
             
             with metric_tabs[2]:
-                # Memory Usage Comparison
-                memory_data = {
-                    'Model': ['GPT-4', 'GPT-4', 'GPT-4', 'GPT-4', 'Gemini', 'Gemini', 'Gemini', 'Gemini'],
-                    'RAG Type': ['Simple', 'Context-Enriched', 'Reranker', 'Hybrid', 'Simple', 'Context-Enriched', 'Reranker', 'Hybrid'],
-                    'Memory (MB)': [150, 180, 200, 220, 140, 170, 190, 210]
-                }
-                df = pd.DataFrame(memory_data)
-                
-                fig = go.Figure(data=[
-                    go.Bar(
-                        name='Memory Usage',
-                        x=[f"{row['RAG Type']} ({row['Model']})" for _, row in df.iterrows()],
-                        y=df['Memory (MB)'],
-                        text=df['Memory (MB)'].apply(lambda x: f'{x}MB'),
-                        textposition='auto',
-                    )
-                ])
-                
-                fig.update_layout(
-                    title='Memory Usage Comparison',
-                    xaxis_title='RAG Implementation (Model)',
-                    yaxis_title='Memory (MB)'
-                )
-                st.plotly_chart(fig)
+                st.plotly_chart(_memory_fig())
+            
+            # Live comparison of every variant on one message
+            from data.message_generator import DEFAULT_MESSAGE_TYPES
+            
+            st.markdown("### Live Comparison")
+            compare_type = st.selectbox("Comparison Message Type", DEFAULT_MESSAGE_TYPES)
+            compare_query = st.text_input("Comparison Query (optional)")
+            if st.button("Run Live Comparison"):
+                _live_comparison(compare_type, compare_query if compare_query else None)
+            
+            # Batch evaluation of live responses
+            st.markdown("### Batch Evaluation")
+            batch_model = st.radio(
+                "Batch Model",
+                ["GPT-4", "Gemini"],
+                horizontal=True
+            )
+            if st.button("Batch Evaluate"):
+                with st.spinner("Summarizing one message of each type with every RAG method..."):
+                    st.dataframe(_batch_evaluate(MODEL_NAMES[batch_model]))
             
             # Key Findings
             st.markdown("""